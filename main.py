@@ -7,6 +7,7 @@ Aplicacion para gestionar contrasenas con cifrado AES256
 
 import os
 import sys
+import multiprocessing
 import tkinter as tk
 from tkinter import messagebox
 import ttkbootstrap as ttk
@@ -73,4 +74,6 @@ def main():
     root.mainloop()
 
 if __name__ == "__main__":
+    # Necesario para el descifrado en paralelo desde el ejecutable de PyInstaller
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -4,42 +4,42 @@
 Gestor de autenticacion y claves
 """
 
-import os
-import base64
-import hashlib
-from Crypto.Cipher import AES
-from Crypto.Util.Padding import pad, unpad
+from ..crypto.session import CryptoSession
 
 class AuthManager:
     """Gestiona la autenticacion y claves de cifrado"""
     
     def __init__(self):
         """Inicializa el gestor de autenticacion"""
-        self.master_key = None
-        self.data_key = None
+        self.session = None
     
     def set_keys(self, master_key, data_key):
         """Establece las claves proporcionadas por el usuario"""
-        self.master_key = master_key
-        self.data_key = data_key
+        # Derivar las claves una sola vez para toda la sesión
+        if self.session is not None:
+            self.session.clear()
+        self.session = CryptoSession(master_key, data_key)
+    
+    def set_cipher(self, cipher):
+        """
+        Establece el cifrado de los mensajes (ver CryptoSession.set_cipher)
+        
+        Args:
+            cipher (str): Nombre del cifrado
+        """
+        self._get_session().set_cipher(cipher)
+    
+    def get_cipher(self):
+        """Obtiene el nombre del cifrado activo"""
+        return self._get_session().cipher
     
     def get_master_key(self):
         """Obtiene la clave maestra derivada"""
-        if self.master_key is None:
-            raise ValueError("Las claves no han sido establecidas")
-            
-        # Derivar clave usando SHA-256 directamente - NO usa salt
-        key = hashlib.sha256(self.master_key.encode('utf-8')).digest()
-        return key
+        return self._get_session().key("master")
     
     def get_data_key(self):
         """Obtiene la clave de datos derivada"""
-        if self.data_key is None:
-            raise ValueError("Las claves no han sido establecidas")
-            
-        # Derivar clave usando SHA-256 directamente - NO usa salt
-        key = hashlib.sha256(self.data_key.encode('utf-8')).digest()
-        return key
+        return self._get_session().key("data")
     
     def encrypt_with_master_key(self, data):
         """
@@ -51,20 +51,7 @@ class AuthManager:
         Returns:
             bytes: Datos cifrados (formato: iv + datos cifrados)
         """
-        if self.master_key is None:
-            raise ValueError("Las claves no han sido establecidas")
-            
-        key = self.get_master_key()
-        iv = os.urandom(16)  # Vector de inicializacion (IV)
-        
-        # Crear cifrador AES en modo CBC con padding
-        cipher = AES.new(key, AES.MODE_CBC, iv)
-        
-        # Cifrar datos con padding
-        encrypted_data = cipher.encrypt(pad(data, AES.block_size))
-        
-        # Combinar IV y datos cifrados
-        return iv + encrypted_data
+        return self._get_session().encrypt("master", data)
     
     def decrypt_with_master_key(self, encrypted_data):
         """
@@ -76,81 +63,121 @@ class AuthManager:
         Returns:
             bytes: Datos descifrados
         """
-        if self.master_key is None:
-            raise ValueError("Las claves no han sido establecidas")
-            
-        key = self.get_master_key()
-        
-        # Extraer IV (primeros 16 bytes)
-        iv = encrypted_data[:16]
-        encrypted_data = encrypted_data[16:]
-        
-        # Crear descifrador AES en modo CBC
-        cipher = AES.new(key, AES.MODE_CBC, iv)
-        
-        # Descifrar datos y quitar padding
+        session = self._get_session()
         try:
-            return unpad(cipher.decrypt(encrypted_data), AES.block_size)
+            return session.decrypt("master", encrypted_data)
         except Exception as e:
             raise ValueError("Error al descifrar datos. Clave incorrecta.") from e
     
-    def encrypt_with_data_key(self, data):
+    def encrypt_many_with_master_key(self, items):
+        """
+        Cifra varios registros con la clave maestra en una sola pasada
+        
+        Args:
+            items (list): Datos (bytes) a cifrar
+            
+        Returns:
+            list: Datos cifrados
+        """
+        return self._get_session().encrypt_many("master", items)
+    
+    def decrypt_many_with_master_key(self, encrypted_items):
+        """
+        Descifra varios registros con la clave maestra en una sola pasada
+        
+        Args:
+            encrypted_items (list): Datos cifrados
+            
+        Returns:
+            list: Datos descifrados; None en los que no se pudieron descifrar
+        """
+        return self._get_session().decrypt_many("master", encrypted_items)
+    
+    def encrypt_with_data_key(self, data, context=b""):
         """
         Cifra datos con la clave de datos
         
         Args:
             data (bytes): Datos a cifrar
+            context (bytes): Contexto autenticado (ver CryptoSession.encrypt)
             
         Returns:
             bytes: Datos cifrados (formato: iv + datos cifrados)
         """
-        if self.data_key is None:
-            raise ValueError("Las claves no han sido establecidas")
-            
-        key = self.get_data_key()
-        iv = os.urandom(16)  # Vector de inicializacion (IV)
-        
-        # Crear cifrador AES en modo CBC con padding
-        cipher = AES.new(key, AES.MODE_CBC, iv)
-        
-        # Cifrar datos con padding
-        encrypted_data = cipher.encrypt(pad(data, AES.block_size))
-        
-        # Combinar IV y datos cifrados
-        return iv + encrypted_data
+        return self._get_session().encrypt("data", data, context)
     
-    def decrypt_with_data_key(self, encrypted_data):
+    def decrypt_with_data_key(self, encrypted_data, context=b""):
         """
         Descifra datos con la clave de datos
         
         Args:
             encrypted_data (bytes): Datos cifrados (formato: iv + datos cifrados)
+            context (bytes): Contexto con el que se cifraron
             
         Returns:
             bytes: Datos descifrados
         """
-        if self.data_key is None:
-            raise ValueError("Las claves no han sido establecidas")
-            
-        key = self.get_data_key()
-        
-        # Extraer IV (primeros 16 bytes)
-        iv = encrypted_data[:16]
-        encrypted_data = encrypted_data[16:]
-        
-        # Crear descifrador AES en modo CBC
-        cipher = AES.new(key, AES.MODE_CBC, iv)
-        
-        # Descifrar datos y quitar padding
+        session = self._get_session()
         try:
-            return unpad(cipher.decrypt(encrypted_data), AES.block_size)
+            return session.decrypt("data", encrypted_data, context)
         except Exception as e:
             raise ValueError("Error al descifrar datos. Clave incorrecta.") from e
     
+    def encrypt_many_with_data_key(self, items, contexts=None):
+        """
+        Cifra varios valores con la clave de datos en una sola pasada
+        
+        Args:
+            items (list): Datos (bytes) a cifrar
+            contexts (list, opcional): Contexto autenticado de cada valor
+            
+        Returns:
+            list: Datos cifrados (formato: iv + datos cifrados)
+        """
+        return self._get_session().encrypt_many("data", items, contexts)
+    
+    def decrypt_many_with_data_key(self, encrypted_items, contexts=None):
+        """
+        Descifra varios valores con la clave de datos en una sola pasada
+        
+        Args:
+            encrypted_items (list): Datos cifrados (formato: iv + datos cifrados)
+            contexts (list, opcional): Contexto con el que se cifró cada valor
+            
+        Returns:
+            list: Datos descifrados; None en los que no se pudieron descifrar
+        """
+        return self._get_session().decrypt_many("data", encrypted_items, contexts)
+    
+    def verify_with_data_key(self, encrypted_data, context=b""):
+        """
+        Comprueba la autenticidad de un valor cifrado con la clave de datos
+        
+        Args:
+            encrypted_data (bytes): Registro cifrado
+            context (bytes): Contexto con el que se cifró
+            
+        Returns:
+            bool: True si el registro es auténtico
+        """
+        return self._get_session().verify("data", encrypted_data, context)
+    
     def clear_keys(self):
         """Limpia las claves de la memoria"""
-        self.master_key = None
-        self.data_key = None
+        if self.session is not None:
+            self.session.clear()
+        self.session = None
+    
+    def _get_session(self):
+        """
+        Obtiene la sesión de cifrado activa
+        
+        Raises:
+            ValueError: Si las claves no han sido establecidas
+        """
+        if self.session is None or not self.session.active:
+            raise ValueError("Las claves no han sido establecidas")
+        return self.session
     
     def test_encryption(self):
         """
@@ -6,9 +6,13 @@ Gestor principal de contrasenas
 
 import time
 import uuid
+import threading
+from contextlib import contextmanager
 from datetime import datetime
 import re
 
+from ..utils.concurrency import synchronized
+
 class PasswordManager:
     """Gestiona las operaciones con contrasenas"""
     
@@ -22,7 +26,11 @@ class PasswordManager:
         self.vault = vault
         self.passwords = []
         self.cached_search = None
+        
+        # Bloqueo para búsquedas desde el hilo de trabajo de la interfaz
+        self.lock = threading.RLock()
     
+    @synchronized
     def get_all_passwords(self):
         """
         Obtiene todas las entradas de contrasenas
@@ -36,6 +44,36 @@ class PasswordManager:
             # Relanzar con mensaje más descriptivo
             raise RuntimeError(f"Error al obtener contraseñas: {str(e)}") from e
     
+    def iter_password_batches(self, batch_size=500):
+        """
+        Obtiene las entradas por lotes (para la carga en segundo plano)
+        
+        Args:
+            batch_size (int): Entradas por lote
+            
+        Yields:
+            list: Lote de entradas
+        """
+        try:
+            yield from self.vault.iter_password_batches(batch_size)
+        except Exception as e:
+            # Relanzar con mensaje más descriptivo
+            raise RuntimeError(f"Error al obtener contraseñas: {str(e)}") from e
+    
+    def count_passwords(self):
+        """
+        Obtiene el número de entradas
+        
+        Returns:
+            int: Número de entradas
+        """
+        try:
+            return self.vault.count_passwords()
+        except Exception as e:
+            # Relanzar con mensaje más descriptivo
+            raise RuntimeError(f"Error al obtener contraseñas: {str(e)}") from e
+    
+    @synchronized
     def add_password(self, entry_data):
         """
         Agrega una nueva entrada de contrasena
@@ -68,6 +106,7 @@ class PasswordManager:
             # Relanzar con mensaje más descriptivo
             raise RuntimeError(f"Error al agregar contraseña: {str(e)}") from e
     
+    @synchronized
     def update_password(self, entry_id, updated_entry):
         """
         Actualiza una entrada existente
@@ -101,6 +140,7 @@ class PasswordManager:
             # Relanzar con mensaje más descriptivo
             raise RuntimeError(f"Error al actualizar contraseña: {str(e)}") from e
     
+    @synchronized
     def delete_password(self, entry_id):
         """
         Elimina una entrada de contrasena
@@ -130,6 +170,27 @@ class PasswordManager:
             # Relanzar con mensaje más descriptivo
             raise RuntimeError(f"Error al eliminar contraseña: {str(e)}") from e
     
+    @contextmanager
+    def transaction(self):
+        """
+        Agrupa varias operaciones en una sola escritura del almacén
+        
+        Las altas, cambios y bajas hechos dentro del bloque se guardan juntos
+        al terminar; si el bloque lanza una excepción no se guarda ninguno
+        (ver PasswordVault.transaction).
+        
+        Yields:
+            PasswordManager: Este gestor
+        """
+        with self.lock:
+            try:
+                with self.vault.transaction():
+                    yield self
+            finally:
+                # Limpiar caché de búsqueda
+                self.cached_search = None
+    
+    @synchronized
     def get_password(self, entry_id):
         """
         Obtiene una entrada de contrasena por ID
@@ -154,6 +215,22 @@ class PasswordManager:
             # Relanzar con mensaje más descriptivo
             raise RuntimeError(f"Error al obtener contraseña: {str(e)}") from e
     
+    def get_list_entry(self, entry_id):
+        """
+        Obtiene una entrada tal como aparece en el listado
+        
+        Args:
+            entry_id (str): ID de la entrada
+            
+        Returns:
+            Entrada o None si no existe
+        """
+        try:
+            return self.vault.get_list_entry(entry_id)
+        except Exception as e:
+            # Relanzar con mensaje más descriptivo
+            raise RuntimeError(f"Error al obtener contraseña: {str(e)}") from e
+    
     def search_passwords(self, query):
         """
         Busca entradas que coincidan con el criterio
@@ -169,17 +246,36 @@ class PasswordManager:
             return self.get_all_passwords()
         
         try:
-            # Realizar búsqueda en el almacén
-            results = self.vault.search_passwords(query)
-            
-            # Guardar resultados en caché
-            self.cached_search = {
-                "query": query,
-                "results": results,
-                "timestamp": time.time()
-            }
+            # La primera búsqueda descifra todo el almacén para construir el
+            # índice: hacerlo sin el bloqueo del gestor ni el del almacén
+            self.vault.ensure_search_index()
             
-            return results
+            with self.lock:
+                cached = self.cached_search
+                normalized = query.lower()
+                
+                if cached and cached["query"].lower() == normalized:
+                    # Misma consulta: reutilizar resultados
+                    return list(cached["results"])
+                
+                if cached and cached["query"].lower() in normalized:
+                    # La consulta amplía la anterior: filtrar solo sus resultados
+                    results = [
+                        entry for entry in cached["results"]
+                        if self._matches_query(entry, normalized)
+                    ]
+                else:
+                    # Realizar búsqueda en el almacén
+                    results = self.vault.search_passwords(query)
+                
+                # Guardar resultados en caché
+                self.cached_search = {
+                    "query": query,
+                    "results": results,
+                    "timestamp": time.time()
+                }
+                
+                return list(results)
         except Exception as e:
             # Relanzar con mensaje más descriptivo
             raise RuntimeError(f"Error al buscar contraseñas: {str(e)}") from e
@@ -267,6 +363,21 @@ class PasswordManager:
             "feedback": feedback
         }
     
+    def _matches_query(self, entry, query):
+        """
+        Comprueba si una entrada coincide con una consulta en minúsculas
+        
+        Args:
+            entry: Entrada descifrada
+            query (str): Texto a buscar, ya en minúsculas
+            
+        Returns:
+            bool: True si algún campo de búsqueda contiene el texto
+        """
+        return (query in entry.get("username", "").lower() or
+                query in entry.get("service", "").lower() or
+                query in entry.get("comment", "").lower())
+    
     def _validate_required_fields(self, entry_data):
         """
         Valida que los campos requeridos estén presentes
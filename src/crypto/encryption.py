@@ -12,6 +12,118 @@ from Crypto.Protocol.KDF import PBKDF2
 from Crypto.Random import get_random_bytes
 from Crypto.Util.Padding import pad, unpad
 
+# Mensajes más largos (en bloques) se cifran por separado en encrypt_cbc_many
+BATCH_MAX_BLOCKS = 64
+
+def _xor(left, right):
+    """
+    Combina dos secuencias de bytes del mismo tamaño con XOR
+    
+    Args:
+        left (bytes): Primer operando
+        right (bytes): Segundo operando
+    
+    Returns:
+        bytes: Resultado
+    """
+    return (int.from_bytes(left, 'big') ^ int.from_bytes(right, 'big')).to_bytes(len(left), 'big')
+
+def encrypt_cbc_many(key, items, ecb=None):
+    """
+    Cifra varios mensajes en modo CBC con IV aleatorios compartiendo el cifrador
+    
+    El bloque i de cada mensaje depende del bloque i-1 del mismo mensaje, pero
+    no de los demás mensajes, así que todos avanzan a la vez: en cada ronda se
+    cifra con una sola llamada AES-ECB el bloque siguiente de cada mensaje que
+    aún no ha terminado. Los mensajes largos se cifran por separado.
+    
+    Args:
+        key (bytes): Clave de cifrado
+        items (list): Mensajes (bytes) a cifrar
+        ecb (opcional): Objeto AES en modo ECB ya preparado con la clave
+    
+    Returns:
+        list: Mensajes cifrados (formato: iv + datos cifrados)
+    """
+    if ecb is None:
+        ecb = AES.new(key, AES.MODE_ECB)
+    
+    padded = [pad(data, AES.block_size) for data in items]
+    ivs = get_random_bytes(16 * len(padded))
+    outputs = [[ivs[16 * i:16 * i + 16]] for i in range(len(padded))]
+    previous = [output[0] for output in outputs]
+    
+    active = []
+    for i, data in enumerate(padded):
+        if len(data) > BATCH_MAX_BLOCKS * AES.block_size:
+            # Un mensaje largo alargaría todas las rondas: usar CBC directamente
+            cipher = AES.new(key, AES.MODE_CBC, previous[i])
+            outputs[i].append(cipher.encrypt(data))
+        else:
+            active.append(i)
+    
+    offset = 0
+    while active:
+        blocks = b"".join(padded[i][offset:offset + 16] for i in active)
+        chain = b"".join(previous[i] for i in active)
+        encrypted = ecb.encrypt(_xor(blocks, chain))
+        
+        remaining = []
+        for j, i in enumerate(active):
+            block = encrypted[16 * j:16 * j + 16]
+            outputs[i].append(block)
+            previous[i] = block
+            if len(padded[i]) > offset + 16:
+                remaining.append(i)
+        
+        active = remaining
+        offset += 16
+    
+    return [b"".join(output) for output in outputs]
+
+def decrypt_cbc_many(key, encrypted_items, ecb=None):
+    """
+    Descifra varios mensajes en modo CBC con una sola llamada AES-ECB
+    
+    En CBC cada bloque descifrado es AES-ECB(C[i]) XOR C[i-1] (con C[-1] = IV),
+    por lo que los cuerpos de todos los mensajes se descifran juntos y la
+    combinación con XOR se aplica también de una vez.
+    
+    Args:
+        key (bytes): Clave de descifrado
+        encrypted_items (list): Mensajes cifrados (formato: iv + datos cifrados)
+        ecb (opcional): Objeto AES en modo ECB ya preparado con la clave
+    
+    Returns:
+        list: Mensajes descifrados; None en los que tienen un tamaño o relleno no válido
+    """
+    if ecb is None:
+        ecb = AES.new(key, AES.MODE_ECB)
+    
+    valid = [
+        len(item) > 16 and (len(item) - 16) % AES.block_size == 0
+        for item in encrypted_items
+    ]
+    bodies = b"".join(item[16:] for item, ok in zip(encrypted_items, valid) if ok)
+    chain = b"".join(item[:-16] for item, ok in zip(encrypted_items, valid) if ok)
+    decrypted = _xor(ecb.decrypt(bodies), chain) if bodies else b""
+    
+    results = []
+    offset = 0
+    for item, ok in zip(encrypted_items, valid):
+        if not ok:
+            results.append(None)
+            continue
+        
+        length = len(item) - 16
+        try:
+            results.append(unpad(decrypted[offset:offset + length], AES.block_size))
+        except ValueError:
+            results.append(None)
+        offset += length
+    
+    return results
+
 class CryptoEngine:
     """Motor de cifrado y descifrado con AES256"""
     
@@ -114,6 +226,39 @@ class CryptoEngine:
         except Exception as e:
             raise ValueError(f"Error en el descifrado: {str(e)}")
     
+    def encrypt_many(self, items, key):
+        """
+        Cifra varios mensajes con AES-256 en modo CBC en una sola pasada
+        
+        Args:
+            items (list): Datos a cifrar (str o bytes)
+            key (bytes): Clave de cifrado
+            
+        Returns:
+            list: Datos cifrados (formato: iv + datos_cifrados)
+            
+        Raises:
+            ValueError: Si hay error en el cifrado
+        """
+        try:
+            items = [data.encode('utf-8') if isinstance(data, str) else data for data in items]
+            return encrypt_cbc_many(key, items)
+        except Exception as e:
+            raise ValueError(f"Error en el cifrado: {str(e)}")
+    
+    def decrypt_many(self, encrypted_items, key):
+        """
+        Descifra varios mensajes con AES-256 en modo CBC en una sola pasada
+        
+        Args:
+            encrypted_items (list): Datos cifrados (formato: iv + datos_cifrados)
+            key (bytes): Clave de descifrado
+            
+        Returns:
+            list: Datos descifrados; None en los mensajes que no se pudieron descifrar
+        """
+        return decrypt_cbc_many(key, encrypted_items)
+    
     def encrypt_to_b64(self, data, key):
         """
         Cifra datos y los convierte a string Base64
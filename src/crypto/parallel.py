@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Descifrado en paralelo con varios procesos
+"""
+
+import os
+import sys
+import multiprocessing
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
+
+from .encryption import decrypt_cbc_many
+from .records import RecordKeys, CIPHER_AEAD
+
+def decrypt_values(cipher, key, encrypted_values, contexts=None):
+    """
+    Descifra valores (se ejecuta en los procesos de trabajo)
+    
+    Debe ser una función de módulo para poder enviarse a otro proceso.
+    
+    Args:
+        cipher (str): Cifrado de los valores (ver records)
+        key (bytes): Clave de descifrado
+        encrypted_values (list): Valores cifrados (bytes)
+        contexts (list, opcional): Contexto autenticado de cada valor (ver records)
+    
+    Returns:
+        list: Textos descifrados; None en los que no se pudieron descifrar
+    """
+    if cipher == CIPHER_AEAD:
+        decrypted_items = RecordKeys(key).open_many(encrypted_values, contexts)
+    else:
+        decrypted_items = decrypt_cbc_many(key, encrypted_values)
+    
+    results = []
+    for decrypted in decrypted_items:
+        try:
+            results.append(decrypted.decode('utf-8') if decrypted is not None else None)
+        except UnicodeDecodeError:
+            results.append(None)
+    return results
+
+class ParallelDecryptor:
+    """
+    Reparte el descifrado de lotes entre varios procesos
+    
+    El descifrado en Python está limitado por el GIL, así que los lotes se
+    envían a un ProcessPoolExecutor y los resultados se devuelven en el orden
+    de los lotes. Los procesos se crean en el primer uso y se mantienen hasta
+    shutdown(); arrancarlos tiene un coste fijo, por lo que solo compensa por
+    encima de un número mínimo de valores.
+    
+    La clave viaja a los procesos de trabajo por la tubería del executor y no
+    se guarda en ellos más allá de cada llamada.
+    
+    Los procesos se arrancan siempre con "spawn" (como en Windows y en el
+    ejecutable de PyInstaller): el almacén los crea desde un hilo de carga
+    mientras otros hilos siguen activos, y duplicar con fork un proceso con
+    varios hilos puede dejar a los hijos bloqueados.
+    """
+    
+    def __init__(self, min_items=20000, max_workers=None):
+        """
+        Inicializa el descifrador (sin procesos todavía)
+        
+        Args:
+            min_items (int): Valores a partir de los que se usa el paralelismo (0 lo desactiva)
+            max_workers (int, opcional): Procesos de trabajo (por defecto, núcleos disponibles)
+        """
+        self.min_items = min_items
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._executor = None
+        self._futures = []
+    
+    def should_use(self, item_count):
+        """
+        Indica si compensa descifrar en paralelo
+        
+        Args:
+            item_count (int): Número de valores a descifrar
+        
+        Returns:
+            bool: True si se debe usar el paralelismo
+        """
+        return 0 < self.min_items <= item_count and self.max_workers > 1
+    
+    def map(self, cipher, key, chunks, contexts=None):
+        """
+        Descifra lotes de valores en paralelo
+        
+        Args:
+            cipher (str): Cifrado de los valores
+            key (bytes): Clave de descifrado
+            chunks (list): Listas de valores cifrados
+            contexts (list, opcional): Listas con el contexto de cada valor, por lote
+        
+        Returns:
+            iterator: Resultados de decrypt_values por lote, en orden
+        """
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        futures = [
+            self._executor.submit(decrypt_values, cipher, key, chunk, chunk_contexts)
+            for chunk, chunk_contexts in zip(chunks, repeat(None) if contexts is None else contexts)
+        ]
+        self._futures = futures
+        return self._results(futures)
+    
+    @staticmethod
+    def _results(futures):
+        """
+        Devuelve los resultados de los lotes en orden
+        
+        Como Executor.map, libera cada resultado al entregarlo y cancela los
+        lotes aún no iniciados si se deja de iterar.
+        
+        Args:
+            futures (list): Futuros de los lotes (se vacía al iterar)
+        
+        Yields:
+            list: Resultado de decrypt_values de cada lote
+        """
+        futures.reverse()
+        try:
+            while futures:
+                yield futures.pop().result()
+        finally:
+            for future in futures:
+                future.cancel()
+    
+    def shutdown(self):
+        """Detiene los procesos de trabajo y cancela los lotes aún no iniciados"""
+        if self._executor is not None:
+            if sys.version_info >= (3, 9):
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            else:
+                # cancel_futures no existe antes de Python 3.9
+                for future in self._futures:
+                    future.cancel()
+                self._executor.shutdown(wait=False)
+            self._executor = None
+            self._futures = []
\ No newline at end of file
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Formato de registro cifrado y autenticado
+"""
+
+import os
+import hmac
+from Crypto.Cipher import AES
+
+# Cifrado del formato anterior: AES-256-CBC con relleno PKCS7 y sin autenticación
+CIPHER_CBC = "aes-256-cbc"
+
+# Cifrado autenticado: AES-256-CTR con HMAC-SHA256 (cifrar y después autenticar)
+CIPHER_AEAD = "aes-256-ctr-hmac-sha256"
+
+# Version del formato de registro (primer byte de cada registro)
+RECORD_VERSION = 1
+
+NONCE_SIZE = 12
+TAG_SIZE = 16
+RECORD_OVERHEAD = 1 + NONCE_SIZE + TAG_SIZE
+
+# Mensajes más largos (en bloques) se cifran con un objeto CTR propio
+BATCH_MAX_BLOCKS = 4096
+
+# Contadores de bloque precalculados (32 bits, big endian)
+_COUNTERS = [counter.to_bytes(4, 'big') for counter in range(BATCH_MAX_BLOCKS)]
+
+class RecordKeys:
+    """
+    Subclaves de cifrado y autenticación derivadas de una clave
+    
+    Formato de cada registro:
+        versión (1 byte) + nonce (12 bytes) + datos cifrados + etiqueta (16 bytes)
+    
+    Los datos se cifran con AES-256-CTR (bloque de contador = nonce + contador
+    de 32 bits desde 0) y la etiqueta es HMAC-SHA256 truncado de versión,
+    nonce y datos cifrados. Comprobar la etiqueta no requiere descifrar, y el
+    flujo de clave de muchos registros se obtiene con una sola llamada AES-ECB.
+    
+    La etiqueta cubre además un contexto que no se guarda en el registro (por
+    ejemplo, la entrada y el campo al que pertenece), seguido de su longitud;
+    un registro solo se abre con el mismo contexto con el que se cifró, así
+    que no se puede trasladar a otra entrada o campo. Sin contexto se usa el
+    vacío.
+    """
+    
+    def __init__(self, key):
+        """
+        Deriva las subclaves
+        
+        Args:
+            key (bytes): Clave de 32 bytes
+        """
+        self.enc_key = bytearray(hmac.digest(key, b"pasmasmand-record-enc", 'sha256'))
+        self.mac_key = bytearray(hmac.digest(key, b"pasmasmand-record-mac", 'sha256'))
+        self._ecb = AES.new(self.enc_key, AES.MODE_ECB)
+        
+        # HMAC ya iniciado con la clave: cada etiqueta parte de una copia
+        self._mac = hmac.new(bytes(self.mac_key), digestmod='sha256')
+    
+    def clear(self):
+        """Sobrescribe las subclaves con ceros"""
+        for key in (self.enc_key, self.mac_key):
+            key[:] = bytes(len(key))
+        self._ecb = None
+        self._mac = None
+    
+    def seal_many(self, items, contexts=None):
+        """
+        Cifra y autentica varios mensajes
+        
+        Args:
+            items (list): Mensajes (bytes)
+            contexts (list, opcional): Contexto (bytes) de cada mensaje
+        
+        Returns:
+            list: Registros
+        """
+        if contexts is None:
+            contexts = [b""] * len(items)
+        
+        nonces = os.urandom(NONCE_SIZE * len(items))
+        prefixes = [
+            bytes([RECORD_VERSION]) + nonces[NONCE_SIZE * i:NONCE_SIZE * (i + 1)]
+            for i in range(len(items))
+        ]
+        ciphertexts = self._apply_keystream(prefixes, items)
+        return [
+            prefix + ciphertext + self._tag(prefix + ciphertext, context)
+            for prefix, ciphertext, context in zip(prefixes, ciphertexts, contexts)
+        ]
+    
+    def open_many(self, records, contexts=None):
+        """
+        Comprueba y descifra varios registros
+        
+        Args:
+            records (list): Registros
+            contexts (list, opcional): Contexto (bytes) con el que se cifró cada registro
+        
+        Returns:
+            list: Mensajes descifrados; None en los registros dañados o con etiqueta incorrecta
+        """
+        if contexts is None:
+            contexts = [b""] * len(records)
+        
+        valid = [self.verify(record, context) for record, context in zip(records, contexts)]
+        prefixes = [record[:1 + NONCE_SIZE] for record, ok in zip(records, valid) if ok]
+        ciphertexts = [record[1 + NONCE_SIZE:-TAG_SIZE] for record, ok in zip(records, valid) if ok]
+        plaintexts = iter(self._apply_keystream(prefixes, ciphertexts))
+        return [next(plaintexts) if ok else None for ok in valid]
+    
+    def verify(self, record, context=b""):
+        """
+        Comprueba la etiqueta de un registro sin descifrarlo
+        
+        Args:
+            record (bytes): Registro
+            context (bytes): Contexto con el que se cifró
+        
+        Returns:
+            bool: True si el registro es auténtico y corresponde al contexto
+        """
+        if len(record) < RECORD_OVERHEAD or record[0] != RECORD_VERSION:
+            return False
+        return hmac.compare_digest(self._tag(record[:-TAG_SIZE], context), record[-TAG_SIZE:])
+    
+    def _tag(self, data, context):
+        """Calcula la etiqueta de autenticación (HMAC-SHA256 truncado)"""
+        mac = self._mac.copy()
+        mac.update(data)
+        mac.update(context + len(context).to_bytes(8, 'big'))
+        return mac.digest()[:TAG_SIZE]
+    
+    def _apply_keystream(self, prefixes, items):
+        """
+        Combina cada mensaje con su flujo de clave AES-CTR
+        
+        Args:
+            prefixes (list): Versión + nonce de cada registro
+            items (list): Mensajes (en claro o cifrados)
+        
+        Returns:
+            list: Mensajes combinados
+        """
+        counters = []
+        padded = []
+        short = []
+        results = [None] * len(items)
+        
+        for i, (prefix, data) in enumerate(zip(prefixes, items)):
+            nonce = prefix[1:]
+            blocks = -(-len(data) // AES.block_size)
+            if blocks > BATCH_MAX_BLOCKS:
+                cipher = AES.new(self.enc_key, AES.MODE_CTR, nonce=nonce, initial_value=0)
+                results[i] = cipher.encrypt(data)
+            else:
+                counters += [nonce + counter for counter in _COUNTERS[:blocks]]
+                # Completar el último bloque para alinear mensaje y flujo de clave
+                padded.append(data)
+                padded.append(bytes(-len(data) % AES.block_size))
+                short.append(i)
+        
+        if short:
+            keystream = self._ecb.encrypt(b"".join(counters))
+            data = b"".join(padded)
+            combined = (int.from_bytes(data, 'big') ^ int.from_bytes(keystream, 'big')).to_bytes(len(data), 'big')
+            
+            offset = 0
+            for i in short:
+                length = len(items[i])
+                results[i] = combined[offset:offset + length]
+                offset += -(-length // AES.block_size) * AES.block_size
+        
+        return results
\ No newline at end of file
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sesion de cifrado con las claves derivadas en memoria
+"""
+
+import os
+import hashlib
+from Crypto.Cipher import AES
+from Crypto.Util.Padding import pad, unpad
+
+from .encryption import encrypt_cbc_many, decrypt_cbc_many
+from .records import RecordKeys, CIPHER_CBC, CIPHER_AEAD
+
+# Nombres de las claves de la sesion
+KEY_NAMES = ("master", "data")
+
+class CryptoSession:
+    """
+    Claves derivadas y estado de cifrado preparado para una sesión
+    
+    Las claves se derivan una sola vez y se guardan en bytearray para poder
+    sobrescribirlas con ceros en clear(). El modo CBC con IV aleatorio no
+    permite reutilizar un objeto de cifrado entre mensajes, pero el descifrado
+    sí: cada bloque es AES-ECB del bloque cifrado combinado (XOR) con el
+    bloque cifrado anterior, así que un único objeto ECB por clave, con la
+    expansión de clave ya hecha, descifra cualquier mensaje en una llamada.
+    
+    El cifrado activo (cipher) lo fija el almacén según su cabecera: CBC para
+    los almacenes anteriores o el formato de registro autenticado de records.
+    """
+    
+    def __init__(self, master_key, data_key):
+        """
+        Deriva las claves de la sesión
+        
+        Args:
+            master_key (str): Clave maestra introducida por el usuario
+            data_key (str): Clave de datos introducida por el usuario
+        """
+        # Derivar clave usando SHA-256 directamente - NO usa salt (formato existente)
+        self._keys = {
+            "master": bytearray(hashlib.sha256(master_key.encode('utf-8')).digest()),
+            "data": bytearray(hashlib.sha256(data_key.encode('utf-8')).digest())
+        }
+        self._ecb = {
+            name: AES.new(key, AES.MODE_ECB) for name, key in self._keys.items()
+        }
+        self._record_keys = {
+            name: RecordKeys(key) for name, key in self._keys.items()
+        }
+        self.cipher = CIPHER_CBC
+    
+    @property
+    def active(self):
+        """Indica si la sesión conserva sus claves"""
+        return bool(self._keys)
+    
+    def key(self, name):
+        """
+        Obtiene una copia de una clave derivada
+        
+        Args:
+            name (str): "master" o "data"
+        
+        Returns:
+            bytes: Clave de 32 bytes
+        """
+        return bytes(self._get_key(name))
+    
+    def set_cipher(self, cipher):
+        """
+        Establece el cifrado de los mensajes
+        
+        Args:
+            cipher (str): CIPHER_CBC o CIPHER_AEAD
+        """
+        if cipher not in (CIPHER_CBC, CIPHER_AEAD):
+            raise ValueError(f"Cifrado no soportado: {cipher}")
+        self.cipher = cipher
+    
+    def encrypt(self, name, data, context=b""):
+        """
+        Cifra datos con el cifrado activo
+        
+        Args:
+            name (str): Clave a usar ("master" o "data")
+            data (bytes): Datos a cifrar
+            context (bytes): Contexto autenticado (CBC no lo usa)
+        
+        Returns:
+            bytes: Datos cifrados (formato: iv + datos cifrados, o registro autenticado)
+        """
+        if self.cipher == CIPHER_AEAD:
+            return self._get_record_keys(name).seal_many([data], [context])[0]
+        
+        iv = os.urandom(16)  # Vector de inicializacion (IV)
+        cipher = AES.new(self._get_key(name), AES.MODE_CBC, iv)
+        return iv + cipher.encrypt(pad(data, AES.block_size))
+    
+    def decrypt(self, name, encrypted_data, context=b""):
+        """
+        Descifra datos con el cifrado activo
+        
+        Args:
+            name (str): Clave a usar ("master" o "data")
+            encrypted_data (bytes): Datos cifrados
+            context (bytes): Contexto con el que se cifraron (CBC no lo usa)
+        
+        Returns:
+            bytes: Datos descifrados
+        
+        Raises:
+            ValueError: Si los datos no tienen un tamaño válido, el relleno es
+                incorrecto o el registro no es auténtico
+        """
+        if self.cipher == CIPHER_AEAD:
+            decrypted = self._get_record_keys(name).open_many([encrypted_data], [context])[0]
+            if decrypted is None:
+                raise ValueError("Registro dañado o clave incorrecta")
+            return decrypted
+        
+        self._get_key(name)
+        length = len(encrypted_data) - 16
+        if length <= 0 or length % AES.block_size:
+            raise ValueError("Tamaño de datos cifrados no válido")
+        
+        # P[i] = D(C[i]) XOR C[i-1], con C[-1] = IV
+        decrypted = self._ecb[name].decrypt(encrypted_data[16:])
+        chained = int.from_bytes(decrypted, 'big') ^ int.from_bytes(encrypted_data[:-16], 'big')
+        return unpad(chained.to_bytes(length, 'big'), AES.block_size)
+    
+    def encrypt_many(self, name, items, contexts=None):
+        """
+        Cifra varios mensajes en una sola pasada (ver encrypt_cbc_many y RecordKeys)
+        
+        Args:
+            name (str): Clave a usar ("master" o "data")
+            items (list): Datos (bytes) a cifrar
+            contexts (list, opcional): Contexto autenticado de cada mensaje (CBC no lo usa)
+        
+        Returns:
+            list: Datos cifrados
+        """
+        if self.cipher == CIPHER_AEAD:
+            return self._get_record_keys(name).seal_many(items, contexts)
+        return encrypt_cbc_many(self._get_key(name), items, self._ecb[name])
+    
+    def decrypt_many(self, name, encrypted_items, contexts=None):
+        """
+        Descifra varios mensajes en una sola pasada (ver decrypt_cbc_many y RecordKeys)
+        
+        Args:
+            name (str): Clave a usar ("master" o "data")
+            encrypted_items (list): Datos cifrados
+            contexts (list, opcional): Contexto con el que se cifró cada mensaje (CBC no lo usa)
+        
+        Returns:
+            list: Datos descifrados; None en los que no se pudieron descifrar
+        """
+        if self.cipher == CIPHER_AEAD:
+            return self._get_record_keys(name).open_many(encrypted_items, contexts)
+        return decrypt_cbc_many(self._get_key(name), encrypted_items, self._ecb[name])
+    
+    def verify(self, name, encrypted_data, context=b""):
+        """
+        Comprueba un registro autenticado sin descifrarlo
+        
+        Args:
+            name (str): Clave a usar ("master" o "data")
+            encrypted_data (bytes): Registro
+            context (bytes): Contexto con el que se cifró
+        
+        Returns:
+            bool: True si el registro es auténtico (siempre False con CBC, que no autentica)
+        """
+        if self.cipher != CIPHER_AEAD:
+            return False
+        return self._get_record_keys(name).verify(encrypted_data, context)
+    
+    def clear(self):
+        """Sobrescribe las claves con ceros y descarta el estado preparado"""
+        for key in self._keys.values():
+            key[:] = bytes(len(key))
+        for record_keys in self._record_keys.values():
+            record_keys.clear()
+        self._keys = {}
+        self._ecb = {}
+        self._record_keys = {}
+    
+    def _get_key(self, name):
+        """Obtiene una clave comprobando que la sesión sigue activa"""
+        if name not in self._keys:
+            raise ValueError("Las claves no han sido establecidas")
+        return self._keys[name]
+    
+    def _get_record_keys(self, name):
+        """Obtiene las subclaves del formato de registro de una clave"""
+        self._get_key(name)
+        return self._record_keys[name]
\ No newline at end of file
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cache acotada de entradas descifradas
+"""
+
+import time
+from collections import OrderedDict
+
+class EntryCache:
+    """
+    Cache LRU de entradas descifradas con caducidad por inactividad
+    
+    Los valores de texto se guardan como bytearray (UTF-8) para poder
+    sobrescribirlos con ceros al expulsarlos, invalidarlos o vaciar la cache.
+    Las cadenas devueltas por get() son copias inmutables que la cache no
+    puede borrar; su vida depende de quien las use.
+    """
+    
+    def __init__(self, max_entries=256, ttl_seconds=300):
+        """
+        Inicializa la cache
+        
+        Args:
+            max_entries (int): Número máximo de entradas (0 desactiva la cache)
+            ttl_seconds (float): Segundos sin acceso tras los que una entrada caduca
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # id -> (ultimo acceso, {campo: valor})
+    
+    def get(self, entry_id):
+        """
+        Obtiene una entrada de la cache
+        
+        Args:
+            entry_id (str): ID de la entrada
+        
+        Returns:
+            dict: Copia de la entrada descifrada o None si no está o caducó
+        """
+        self._purge_expired()
+        
+        cached = self._entries.get(entry_id)
+        if cached is None:
+            return None
+        
+        # Renovar acceso y mover al final (más reciente)
+        _, fields = cached
+        self._entries[entry_id] = (time.monotonic(), fields)
+        self._entries.move_to_end(entry_id)
+        
+        return {
+            field: value.decode('utf-8') if isinstance(value, bytearray) else value
+            for field, value in fields.items()
+        }
+    
+    def put(self, entry_id, entry):
+        """
+        Guarda una entrada descifrada
+        
+        Args:
+            entry_id (str): ID de la entrada
+            entry (dict): Entrada descifrada
+        """
+        if self.max_entries <= 0:
+            return
+        
+        self.invalidate(entry_id)
+        
+        fields = {
+            field: bytearray(value.encode('utf-8')) if isinstance(value, str) else value
+            for field, value in entry.items()
+        }
+        self._entries[entry_id] = (time.monotonic(), fields)
+        
+        # Expulsar las menos usadas recientemente
+        while len(self._entries) > self.max_entries:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._wipe(evicted)
+    
+    def invalidate(self, entry_id):
+        """
+        Elimina y borra una entrada de la cache
+        
+        Args:
+            entry_id (str): ID de la entrada
+        """
+        cached = self._entries.pop(entry_id, None)
+        if cached is not None:
+            self._wipe(cached[1])
+    
+    def clear(self):
+        """Borra todas las entradas de la cache"""
+        while self._entries:
+            _, (_, fields) = self._entries.popitem()
+            self._wipe(fields)
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def _purge_expired(self):
+        """Elimina las entradas caducadas (las más antiguas están al principio)"""
+        if self.ttl_seconds is None:
+            return
+        
+        limit = time.monotonic() - self.ttl_seconds
+        while self._entries:
+            entry_id, (last_access, fields) = next(iter(self._entries.items()))
+            if last_access > limit:
+                break
+            del self._entries[entry_id]
+            self._wipe(fields)
+    
+    @staticmethod
+    def _wipe(fields):
+        """
+        Sobrescribe con ceros los valores mutables de una entrada
+        
+        Args:
+            fields (dict): Campos de la entrada
+        """
+        for value in fields.values():
+            if isinstance(value, bytearray):
+                value[:] = bytes(len(value))
+        fields.clear()
\ No newline at end of file
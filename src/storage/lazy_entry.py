@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Entrada de contrasena con descifrado diferido por campo
+"""
+
+from collections.abc import Mapping
+
+class LazyEntry(Mapping):
+    """
+    Entrada de solo lectura que descifra ciertos campos al accederlos
+    
+    Se comporta como un diccionario: los campos ya descifrados se devuelven
+    directamente y los pendientes se piden a la función de descifrado cada
+    vez que se leen con entry[campo] o entry.get(campo). La entrada no guarda
+    los valores obtenidos: el almacén los sirve desde su cache de entradas,
+    que los caduca y los borra.
+    """
+    
+    def __init__(self, values, pending, decrypt_field):
+        """
+        Inicializa la entrada
+        
+        Args:
+            values (dict): Campos ya disponibles en texto plano (id, fechas, etc.)
+            pending (dict): Campos cifrados pendientes {campo: valor cifrado}
+            decrypt_field (callable): Funcion (id, campo, valor cifrado) -> str
+        """
+        self._values = values
+        self._pending = pending
+        self._decrypt_field = decrypt_field
+    
+    def __getitem__(self, key):
+        if key in self._pending:
+            return self._decrypt_field(self._values.get("id"), key, self._pending[key])
+        return self._values[key]
+    
+    def __contains__(self, key):
+        # Comprobar sin forzar el descifrado
+        return key in self._values or key in self._pending
+    
+    def __iter__(self):
+        yield from list(self._values)
+        yield from list(self._pending)
+    
+    def __len__(self):
+        return len(self._values) + len(self._pending)
+    
+    def __repr__(self):
+        # No mostrar nunca valores descifrados
+        return f"LazyEntry(id={self._values.get('id')!r}, pending={sorted(self._pending)!r})"
+    
+    def is_decrypted(self, field):
+        """
+        Indica si un campo está disponible en texto plano
+        
+        Args:
+            field (str): Nombre del campo
+        
+        Returns:
+            bool: True si el campo no requiere descifrado (los diferidos siempre lo requieren)
+        """
+        return field not in self._pending
\ No newline at end of file
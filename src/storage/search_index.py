@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Indice de busqueda en memoria por n-gramas
+"""
+
+# Campos indexados para la busqueda
+SEARCH_FIELDS = ("service", "username", "comment")
+
+# Longitud maxima de los n-gramas indexados
+MAX_GRAM = 3
+
+class SearchIndex:
+    """
+    Indice invertido de n-gramas (1 a 3 caracteres) sobre texto en minúsculas
+    
+    Una consulta de hasta 3 caracteres se resuelve con una sola lista de
+    apariciones; una más larga intersecta las listas de sus trigramas y
+    verifica los candidatos, de modo que el coste depende de las coincidencias
+    y no del tamaño del almacén.
+    """
+    
+    def __init__(self):
+        """Inicializa un índice vacío"""
+        self._fields = {}    # id -> {campo: texto original}
+        self._texts = {}     # id -> tupla de textos en minúsculas
+        self._postings = {}  # n-grama -> set(ids)
+    
+    def add(self, entry_id, entry):
+        """
+        Indexa (o reindexa) una entrada
+        
+        Args:
+            entry_id (str): ID de la entrada
+            entry: Entrada con los campos de búsqueda en texto plano
+        """
+        self.remove(entry_id)
+        
+        fields = {field: entry.get(field, "") or "" for field in SEARCH_FIELDS}
+        texts = tuple(fields[field].lower() for field in SEARCH_FIELDS)
+        
+        self._fields[entry_id] = fields
+        self._texts[entry_id] = texts
+        
+        for gram in self._grams(texts):
+            self._postings.setdefault(gram, set()).add(entry_id)
+    
+    def remove(self, entry_id):
+        """
+        Elimina una entrada del índice
+        
+        Args:
+            entry_id (str): ID de la entrada
+        """
+        texts = self._texts.pop(entry_id, None)
+        if texts is None:
+            return
+        
+        del self._fields[entry_id]
+        for gram in self._grams(texts):
+            ids = self._postings.get(gram)
+            if ids is not None:
+                ids.discard(entry_id)
+                if not ids:
+                    del self._postings[gram]
+    
+    def search(self, query):
+        """
+        Busca entradas que contengan el texto en algún campo indexado
+        
+        Args:
+            query (str): Texto a buscar (sin distinguir mayúsculas)
+        
+        Returns:
+            set: IDs de las entradas que coinciden
+        """
+        query = query.lower()
+        if not query:
+            return set(self._texts)
+        
+        if len(query) <= MAX_GRAM:
+            return set(self._postings.get(query, ()))
+        
+        # Intersectar empezando por la lista más corta
+        postings = []
+        for i in range(len(query) - MAX_GRAM + 1):
+            ids = self._postings.get(query[i:i + MAX_GRAM])
+            if not ids:
+                return set()
+            postings.append(ids)
+        postings.sort(key=len)
+        
+        candidates = set(postings[0])
+        for ids in postings[1:]:
+            candidates &= ids
+            if not candidates:
+                return candidates
+        
+        # Verificar la subcadena completa en cada campo
+        return {
+            entry_id for entry_id in candidates
+            if any(query in text for text in self._texts[entry_id])
+        }
+    
+    def fields(self, entry_id):
+        """
+        Obtiene los campos indexados de una entrada
+        
+        Args:
+            entry_id (str): ID de la entrada
+        
+        Returns:
+            dict: Campos en texto plano
+        """
+        return self._fields[entry_id]
+    
+    def __contains__(self, entry_id):
+        return entry_id in self._texts
+    
+    def __len__(self):
+        return len(self._texts)
+    
+    @staticmethod
+    def _grams(texts):
+        """
+        Obtiene los n-gramas distintos de los textos de una entrada
+        
+        Args:
+            texts (tuple): Textos en minúsculas
+        
+        Returns:
+            set: N-gramas de longitud 1 a MAX_GRAM
+        """
+        grams = set()
+        for text in texts:
+            length = len(text)
+            for i in range(length):
+                for n in range(1, MAX_GRAM + 1):
+                    if i + n > length:
+                        break
+                    grams.add(text[i:i + n])
+        return grams
\ No newline at end of file
@@ -7,11 +7,41 @@ Almacen de contrasenas cifradas
 import os
 import json
 import time
+import struct
 import uuid
-import base64
+import itertools
+import threading
 import traceback
+from contextlib import contextmanager
 from datetime import datetime
 
+from ..crypto.parallel import ParallelDecryptor
+from ..crypto.records import CIPHER_CBC, CIPHER_AEAD
+from ..utils.atomic_file import write_atomic, temp_path, fsync_directory
+from ..utils.concurrency import synchronized
+
+from . import vault_format
+from .entry_cache import EntryCache
+from .lazy_entry import LazyEntry
+from .vault_reader import VaultReader
+from .search_index import SearchIndex, SEARCH_FIELDS
+
+# Version del formato del indice de busqueda persistente
+SEARCH_SIDECAR_VERSION = 1
+
+# Campos cifrados de cada entrada
+ENTRY_FIELDS = ("username", "service", "password", "comment")
+
+# Campos que el listado descifra solo cuando se accede a ellos
+LAZY_FIELDS = ("password",)
+
+# Entradas modificadas que se cifran juntas al guardar (limita la memoria del guardado)
+SAVE_BATCH_SIZE = 256
+
+# Cabecera en claro de cada registro del diario: longitud del registro cifrado
+# y generación de la instantánea sobre la que se escribió
+JOURNAL_FRAME = struct.Struct(">IQ")
+
 class PasswordVault:
     """Gestiona el almacenamiento seguro de contrasenas"""
     
@@ -27,6 +57,63 @@ class PasswordVault:
         self.config = config
         self.vault_path = config.get_vault_path()
         self.data = None
+        self.header = None  # Cabecera en claro del archivo (None en almacenes antiguos)
+        self.prefetch = None  # Lectura anticipada del archivo (VaultPrefetch)
+        self._reader = None  # Acceso aleatorio al archivo sin cargarlo (VaultReader)
+        
+        # Cifrado de los almacenes nuevos; los anteriores se migran al cargarlos
+        self.target_cipher = config.get("vault_cipher", CIPHER_AEAD)
+        
+        # La clave de datos coincide con la cabecera o ya descifró algún campo;
+        # hasta entonces no se registra en la cabecera
+        self._data_key_verified = False
+        
+        # Bloqueo para el acceso desde hilos de trabajo (búsqueda, carga, guardado)
+        self.lock = threading.RLock()
+        
+        # Indice ID -> posicion en self.data["passwords"]
+        self._positions = {}
+        self._mutations = 0  # Contador de cambios (para detectar copias obsoletas)
+        
+        # Registros cifrados con la clave maestra de las entradas sin cambios
+        # desde la última lectura o guardado (las ausentes están pendientes)
+        self._sealed_records = {}
+        
+        # Cache de entradas descifradas (caduca con el mismo plazo que la sesión)
+        self.entry_cache = EntryCache(
+            max_entries=config.get("entry_cache_size", 256),
+            ttl_seconds=config.get("auto_logout_minutes", 5) * 60
+        )
+        
+        # Descifrado en varios procesos para almacenes grandes
+        self.parallel_decryptor = ParallelDecryptor(
+            min_items=config.get("parallel_decrypt_threshold", 20000),
+            max_workers=config.get("parallel_decrypt_workers", 0)
+        )
+        
+        # Indice de búsqueda (se construye tras el primer descifrado completo)
+        self.search_index = None
+        
+        # Copia cifrada del índice junto al almacén para búsquedas inmediatas
+        self.search_sidecar_path = self.vault_path + ".idx"
+        self.search_sidecar_enabled = config.get("search_index_sidecar", True)
+        self._search_sidecar_dirty = False
+        
+        # Diario de cambios (modo de solo anexado)
+        self.journal_path = self.vault_path + ".journal"
+        self.journal_enabled = config.get("journal_mode", True)
+        self.journal_compact_threshold = config.get("journal_compact_threshold", 500)
+        self.journal_records = 0
+        
+        # Cambios de la transacción en curso (None fuera de una transacción)
+        self._transaction = None
+        
+        # Escritura diferida: cambios aplicados en memoria pendientes de
+        # guardar (None con escritura inmediata) y escritura en curso
+        self._pending = None
+        self._notify_pending = None
+        self._writing = False
+        self._write_done = threading.Condition(self.lock)
     
     def exists(self):
         """
@@ -35,8 +122,35 @@ class PasswordVault:
         Returns:
             bool: True si el almacen existe
         """
+        self._recover_temp_file()
         return os.path.exists(self.vault_path) and os.path.getsize(self.vault_path) > 0
     
+    def _recover_temp_file(self):
+        """
+        Resuelve el archivo temporal que deja un guardado interrumpido
+        
+        Un temporal completo solo queda si la interrupción llegó entre la
+        sincronización y el renombrado: es más reciente que el almacén y lo
+        sustituye (los registros del diario que ya incluye se descartan al
+        cargarlo, ver _replay_journal). Un temporal incompleto se descarta,
+        porque el almacén no se llegó a modificar.
+        """
+        temporary = temp_path(self.vault_path)
+        with self.lock:
+            if self._writing or not os.path.exists(temporary):
+                return
+            
+            try:
+                if vault_format.is_complete(temporary):
+                    print("DEBUG: Recuperando el almacén de un guardado interrumpido")
+                    os.replace(temporary, self.vault_path)
+                    fsync_directory(os.path.dirname(os.path.abspath(self.vault_path)))
+                else:
+                    print("DEBUG: Descartando el temporal de un guardado interrumpido")
+                    os.remove(temporary)
+            except OSError as e:
+                print(f"DEBUG: No se pudo resolver el temporal del almacén: {str(e)}")
+    
     def initialize_vault(self):
         """
         Crea un nuevo almacen vacio
@@ -55,27 +169,63 @@ class PasswordVault:
             "passwords": []
         }
         
-        # Convertir a JSON y cifrar
+        # Convertir a JSON y cifrar (las claves de un almacén nuevo son las válidas)
+        self.auth_manager.set_cipher(self.target_cipher)
+        self._data_key_verified = True
         return self.save(vault_data)
     
     def test_keys(self):
         """
         Prueba si las claves pueden descifrar el almacen
         
+        Si el archivo tiene cabecera, ambas claves se comprueban contra sus
+        bloques de comprobación sin descifrar el almacén, que se carga después
+        (en segundo plano desde la ventana principal). Un almacén sin cabecera
+        se carga por completo y se reescribe con ella.
+        
+        La cabecera de un almacén que no tenía campos cifrados no incluye el
+        bloque de la clave de datos (no había con qué comprobarla); en ese caso
+        el almacén se carga y la clave se comprueba con los campos actuales.
+        
         Returns:
             bool: True si las claves son correctas
         """
         try:
-            # Intentar cargar el almacen
+            if self.prefetch is not None and self.prefetch.is_current():
+                header = self.prefetch.header
+            else:
+                header = vault_format.read_header(self.vault_path)
+            if header is not None and "key_checks" in header:
+                valid = self._keys_match(header["key_checks"])
+                print(f"DEBUG: Claves comprobadas con la cabecera: {valid}")
+                if not valid or "data" in header["key_checks"]:
+                    self._data_key_verified = valid
+                    return valid
+                print("DEBUG: La cabecera no comprueba la clave de datos")
+            
+            # Almacen sin cabecera o sin comprobación de la clave de datos: intentar cargarlo
             print("DEBUG: Intentando cargar almacén en test_keys()")
             self.load()
+            if self._check_data_key() > 0:
+                self._data_key_verified = True
             print("DEBUG: Almacén cargado correctamente en test_keys()")
+            
+            # Añadir la cabecera para que el próximo inicio no tenga que descifrar
+            # (load() ya la añade si migró el cifrado)
+            if self.header is None or (
+                self._data_key_verified and "data" not in self.header.get("key_checks", {})
+            ):
+                try:
+                    self.save()
+                except Exception as e:
+                    print(f"DEBUG: No se pudo añadir la cabecera al almacén: {str(e)}")
             return True
         except Exception as e:
             print(f"DEBUG: Error en test_keys(): {str(e)}")
             print(traceback.format_exc())
             return False
     
+    @synchronized
     def load(self):
         """
         Carga el almacen cifrado desde el disco
@@ -92,33 +242,61 @@ class PasswordVault:
             raise ValueError("No se encontró un almacén de contraseñas")
         
         try:
-            # Leer archivo cifrado
-            print(f"DEBUG: Leyendo archivo cifrado desde {self.vault_path}")
-            with open(self.vault_path, 'rb') as f:
-                encrypted_data = f.read()
+            # Reutilizar la lectura anticipada si el archivo no cambió
+            encrypted_data = self.prefetch.take() if self.prefetch is not None else None
+            self.prefetch = None
+            
+            if encrypted_data is None:
+                # Leer archivo cifrado
+                print(f"DEBUG: Leyendo archivo cifrado desde {self.vault_path}")
+                with open(self.vault_path, 'rb') as f:
+                    encrypted_data = f.read()
             
             print(f"DEBUG: Leídos {len(encrypted_data)} bytes de datos cifrados")
             
-            # Descifrar con clave maestra
-            print("DEBUG: Intentando descifrar con clave maestra")
-            json_data = self.auth_manager.decrypt_with_master_key(encrypted_data)
+            # Separar la cabecera en claro (si existe)
+            version, header, encrypted_data = vault_format.unpack_vault(encrypted_data)
             
-            print(f"DEBUG: Datos descifrados exitosamente, longitud: {len(json_data)}")
+            # Los almacenes sin cifrado en la cabecera usan el formato CBC anterior
+            self.auth_manager.set_cipher((header or {}).get("cipher", CIPHER_CBC))
             
-            # Convertir de JSON a diccionario
-            vault_data = json.loads(json_data.decode('utf-8'))
+            # Descifrar con clave maestra
+            print("DEBUG: Intentando descifrar con clave maestra")
+            if version >= vault_format.FORMAT_INDEXED:
+                # Los registros terminan donde empieza la tabla de posiciones
+                encrypted_data = encrypted_data[:vault_format.read_trailer(encrypted_data)[0]]
+            sealed_records = {}
+            if version >= vault_format.FORMAT_RECORDS:
+                vault_data, sealed_records = self._decrypt_records(encrypted_data, version)
+            else:
+                vault_data = self._decrypt_document(encrypted_data)
             
-            print("DEBUG: JSON decodificado correctamente")
+            print(f"DEBUG: Descifradas {len(vault_data['passwords'])} entradas")
             
             # Almacenar en memoria
             self.data = vault_data
-            return vault_data
+            self.header = header
+            self._sealed_records = sealed_records
+            self._rebuild_index()
+            
+            # Aplicar cambios pendientes del diario sobre la instantanea base
+            self._replay_journal()
+            
+            # Migrar una sola vez los almacenes con el cifrado o el contenedor anterior
+            migrated = False
+            if self.auth_manager.get_cipher() != self.target_cipher:
+                migrated = self._migrate_cipher()
+            if not migrated and header is not None and version != vault_format.FORMAT_VERSION:
+                self._upgrade_container()
+            
+            return self.data
             
         except Exception as e:
             print(f"DEBUG: Error en load(): {str(e)}")
             print(traceback.format_exc())
             raise ValueError(f"Error al cargar el almacén: {str(e)}")
     
+    @synchronized
     def save(self, data=None):
         """
         Guarda datos cifrados en el almacen
@@ -139,42 +317,15 @@ class PasswordVault:
                     raise ValueError("No hay datos para guardar")
                 data = self.data
             
+            # Esperar a que termine una escritura del hilo de guardado
+            self._wait_for_write()
+            
             # Actualizar fecha de modificación
             data["metadata"]["updated_at"] = datetime.now().isoformat()
             
-            # Convertir a JSON
-            json_data = json.dumps(data, ensure_ascii=False).encode('utf-8')
-            
-            print(f"DEBUG: Convertido a JSON, longitud: {len(json_data)}")
-            
-            # Cifrar con clave maestra
-            encrypted_data = self.auth_manager.encrypt_with_master_key(json_data)
-            
-            print(f"DEBUG: Datos cifrados con clave maestra, longitud: {len(encrypted_data)}")
-            
-            # Obtener el directorio del vault
-            vault_dir = os.path.dirname(os.path.abspath(self.vault_path))
-            
-            # Asegurar que el directorio existe
-            try:
-                os.makedirs(vault_dir, exist_ok=True)
-                print(f"DEBUG: Directorio asegurado: {vault_dir}")
-            except Exception as dir_error:
-                print(f"DEBUG: Error al crear directorio {vault_dir}: {str(dir_error)}")
-                # Si no podemos crear el directorio, intentar usar el directorio actual
-                if not os.path.isabs(self.vault_path):
-                    alt_path = os.path.basename(self.vault_path)
-                    print(f"DEBUG: Intentando usar ruta alternativa: {alt_path}")
-                    self.vault_path = alt_path
-            
-            # Guardar en archivo
-            with open(self.vault_path, 'wb') as f:
-                f.write(encrypted_data)
-            
-            print(f"DEBUG: Datos cifrados guardados en {self.vault_path}")
-            
-            # Actualizar datos en memoria
-            self.data = data
+            snapshot = self._seal_snapshot(data)
+            self._write_snapshot(snapshot)
+            self._install_snapshot(snapshot)
             return True
             
         except Exception as e:
@@ -182,243 +333,1720 @@ class PasswordVault:
             print(traceback.format_exc())
             raise ValueError(f"Error al guardar el almacén: {str(e)}")
     
-    # El resto del código permanece igual...
-    def get_all_passwords(self):
+    def _seal_snapshot(self, data):
         """
-        Obtiene todas las entradas de contrasenas
+        Toma una instantánea de los datos para escribirla
+        
+        La instantánea copia la lista de entradas (las entradas no se
+        modifican, se reemplazan), así que los datos pueden seguir cambiando
+        mientras se escribe. Las entradas modificadas se cifran por lotes
+        mientras se escriben, y los metadatos al final, con el resumen de los
+        registros escritos.
+        
+        Los metadatos escritos llevan la siguiente generación del diario: la
+        instantánea incluye todos los registros del diario anteriores, que
+        así se descartan si el diario sobrevive al guardado.
         
+        Args:
+            data (dict): Datos del almacén
+            
         Returns:
-            list: Lista de entradas descifradas
+            tuple: (datos, entradas, registros cifrados por ID, cabecera,
+                metadatos, generación del diario)
         """
-        # Cargar datos si no están en memoria
-        if self.data is None:
-            self.load()
+        # Reutilizar los registros cifrados de las entradas sin cambios
+        passwords = list(data.get("passwords", []))
+        sealed_records = dict(self._sealed_records) if data is self.data else {}
         
-        # Lista para almacenar entradas descifradas
-        decrypted_entries = []
+        generation = data["metadata"].get("journal_generation", 0) + 1
+        metadata = dict(data["metadata"], journal_generation=generation)
         
-        # Procesar cada entrada
-        for entry in self.data.get("passwords", []):
+        # Anteponer la cabecera con el cifrado y las comprobaciones de las
+        # claves; la de datos solo si ya descifró algún campo del almacén
+        keys = self._derived_keys()
+        if not self._data_key_verified:
             try:
-                # Descifrar cada campo con la clave de datos
-                decrypted_entry = self._decrypt_entry(entry)
-                decrypted_entries.append(decrypted_entry)
+                self._data_key_verified = self._check_data_key(passwords) > 0
             except Exception as e:
-                print(f"Error al descifrar entrada {entry.get('id', 'desconocido')}: {str(e)}")
+                print(f"DEBUG: La clave de datos no descifra el almacén: {str(e)}")
+        if not self._data_key_verified:
+            del keys["data"]
+        header = vault_format.build_header(keys, self.auth_manager.get_cipher())
         
-        return decrypted_entries
+        # Windows no permite sustituir un archivo proyectado en memoria; en el
+        # resto de sistemas el lector conserva la versión anterior hasta reabrirse
+        if os.name == "nt":
+            self._close_reader()
+        
+        return data, passwords, sealed_records, header, metadata, generation
     
-    def add_password(self, entry_data):
+    def _iter_sealed_records(self, snapshot):
         """
-        Agrega una nueva entrada de contrasena
+        Recorre los registros cifrados de una instantánea en el orden del archivo
+        
+        Las entradas modificadas se codifican y cifran por lotes de
+        SAVE_BATCH_SIZE justo antes de escribirse, y sus registros se añaden a
+        los de la instantánea, de modo que la memoria extra del guardado no
+        crece con el tamaño del almacén.
+        
+        El último registro contiene los metadatos con el resumen de los
+        registros de las entradas (ver vault_format.new_manifest), que se
+        comprueba al cargar.
         
         Args:
-            entry_data (dict): Datos de la entrada
+            snapshot (tuple): Instantánea creada por _seal_snapshot
+        
+        Yields:
+            tuple: (ID o None para los metadatos, registro cifrado)
+        """
+        _, passwords, sealed_records, _, metadata, _ = snapshot
+        manifest = vault_format.new_manifest()
+        
+        sealed = 0
+        for start in range(0, len(passwords), SAVE_BATCH_SIZE):
+            batch = passwords[start:start + SAVE_BATCH_SIZE]
             
-        Returns:
-            str: ID de la entrada creada
+            # Cifrar con clave maestra, en una sola pasada, las entradas modificadas del lote
+            dirty = [entry for entry in batch if entry["id"] not in sealed_records]
+            if dirty:
+                records = self.auth_manager.encrypt_many_with_master_key(
+                    [vault_format.encode_entry(entry, ENTRY_FIELDS) for entry in dirty]
+                )
+                sealed_records.update((entry["id"], record) for entry, record in zip(dirty, records))
+                sealed += len(dirty)
+            
+            for entry in batch:
+                vault_format.add_to_manifest(manifest, entry["id"], sealed_records[entry["id"]])
+                yield entry["id"], sealed_records[entry["id"]]
+        
+        print(f"DEBUG: Cifradas {sealed} de {len(passwords)} entradas")
+        
+        metadata = dict(metadata, records=vault_format.manifest_summary(manifest))
+        yield None, self.auth_manager.encrypt_with_master_key(
+            json.dumps(metadata, ensure_ascii=False).encode('utf-8')
+        )
+    
+    def _write_snapshot(self, snapshot):
         """
-        # Cargar datos si no están en memoria
-        if self.data is None:
-            self.load()
+        Cifra las entradas modificadas de una instantánea y la escribe en el archivo
         
-        # Generar ID único
-        entry_id = str(uuid.uuid4())
+        No usa el estado del almacén, por lo que el hilo de guardado la
+        llama sin mantener el bloqueo.
         
-        # Crear estructura de entrada
-        entry = {
-            "id": entry_id,
-            "created_at": datetime.now().isoformat(),
-            "updated_at": datetime.now().isoformat()
-        }
+        Args:
+            snapshot (tuple): Instantánea creada por _seal_snapshot
+        """
+        header = snapshot[3]
         
-        # Cifrar campos con la clave de datos
-        encrypted_entry = self._encrypt_entry(entry_data, entry)
+        # Obtener el directorio del vault
+        vault_dir = os.path.dirname(os.path.abspath(self.vault_path))
         
-        # Agregar a la lista de contraseñas
-        self.data["passwords"].append(encrypted_entry)
+        # Asegurar que el directorio existe
+        try:
+            os.makedirs(vault_dir, exist_ok=True)
+            print(f"DEBUG: Directorio asegurado: {vault_dir}")
+        except Exception as dir_error:
+            print(f"DEBUG: Error al crear directorio {vault_dir}: {str(dir_error)}")
+            # Si no podemos crear el directorio, intentar usar el directorio actual
+            if not os.path.isabs(self.vault_path):
+                alt_path = os.path.basename(self.vault_path)
+                print(f"DEBUG: Intentando usar ruta alternativa: {alt_path}")
+                self.vault_path = alt_path
         
-        # Guardar cambios
-        self.save()
+        # Cifrar y escribir las entradas por fragmentos en un temporal y
+        # sustituir el archivo (nunca queda a medias)
+        write_atomic(self.vault_path, itertools.chain(
+            [vault_format.pack_header(header, vault_format.FORMAT_VERSION)],
+            vault_format.iter_indexed_records(self._iter_sealed_records(snapshot))
+        ))
         
-        return entry_id
+        print(f"DEBUG: Datos cifrados guardados en {self.vault_path}")
     
-    def update_password(self, entry_id, entry_data):
+    def _install_snapshot(self, snapshot):
         """
-        Actualiza una entrada existente
+        Actualiza el estado en memoria tras escribir una instantánea
+        
+        Solo se conservan los registros cifrados de las entradas que no han
+        cambiado desde que se tomó la instantánea.
         
         Args:
-            entry_id (str): ID de la entrada a actualizar
-            entry_data (dict): Nuevos datos
+            snapshot (tuple): Instantánea creada por _seal_snapshot
+        """
+        data, passwords, sealed_records, header, _, generation = snapshot
+        
+        # Actualizar datos en memoria
+        if data is not self.data:
+            self.data = data
+            self._rebuild_index()
+        
+        self.header = header
+        self.data["metadata"]["journal_generation"] = generation
+        self._sealed_records = {
+            entry["id"]: sealed_records[entry["id"]]
+            for entry in passwords
+            if self._find_entry(entry["id"]) is entry
+        }
+        
+        # La instantanea incluye todos los cambios: descartar el diario
+        self._truncate_journal()
+    
+    def defer_writes(self, notify):
+        """
+        Activa o desactiva la escritura diferida
+        
+        Con la escritura diferida, add_password, update_password,
+        delete_password y las transacciones solo modifican los datos en
+        memoria y acumulan sus cambios; write_pending() los persiste (ver
+        VaultSaver).
+        
+        Args:
+            notify (callable): Función sin argumentos a la que se avisa de cada
+                cambio pendiente, o None para volver a la escritura inmediata
             
+        Raises:
+            ValueError: Si se desactiva con cambios pendientes de guardar
+        """
+        with self.lock:
+            if notify is None:
+                if self._pending:
+                    raise ValueError("Hay cambios pendientes de guardar")
+                self._pending = None
+            elif self._pending is None:
+                self._pending = []
+            self._notify_pending = notify
+    
+    def write_pending(self):
+        """
+        Persiste los cambios acumulados por la escritura diferida
+        
+        Todos los cambios se guardan juntos: en modo diario como un único
+        registro, o si no (o si el diario debe compactarse) como una
+        instantánea completa. La instantánea se toma con el bloqueo del
+        almacén pero se cifra y escribe sin él, de modo que la interfaz puede
+        seguir modificando los datos durante la escritura.
+        
         Returns:
-            bool: True si se actualizó correctamente
+            int: Número de cambios guardados
             
         Raises:
-            ValueError: Si la entrada no existe
+            ValueError: Si falla la escritura (los cambios siguen pendientes)
         """
-        # Cargar datos si no están en memoria
-        if self.data is None:
-            self.load()
-        
-        # Buscar la entrada por ID
-        for i, entry in enumerate(self.data["passwords"]):
-            if entry["id"] == entry_id:
-                # Mantener datos originales que no se deben cambiar
-                original = entry.copy()
-                original["updated_at"] = datetime.now().isoformat()
-                
-                # Cifrar nuevos datos
-                updated_entry = self._encrypt_entry(entry_data, original)
-                
-                # Actualizar entrada
-                self.data["passwords"][i] = updated_entry
+        with self.lock:
+            self._wait_for_write()
+            records = self._pending
+            if not records:
+                return 0
+            self._pending = []
+            
+            try:
+                batch = {"op": "batch", "records": records}
+                if self.journal_enabled and self.journal_records + 1 < self.journal_compact_threshold:
+                    self._persist_change(batch)
+                    return len(records)
                 
-                # Guardar cambios
-                self.save()
-                return True
+                self.data["metadata"]["updated_at"] = datetime.now().isoformat()
+                snapshot = self._seal_snapshot(self.data)
+            except Exception:
+                self._pending[:0] = records
+                raise
+            self._writing = True
+        
+        error = None
+        try:
+            self._write_snapshot(snapshot)
+        except Exception as e:
+            error = e
         
-        # La entrada no existe
-        raise ValueError(f"No se encontró una entrada con ID '{entry_id}'")
+        with self.lock:
+            self._writing = False
+            self._write_done.notify_all()
+            if error is not None:
+                # Volver a dejar los cambios pendientes para el siguiente intento
+                print(f"DEBUG: Error en write_pending(): {str(error)}")
+                self._pending[:0] = records
+                raise ValueError(f"Error al guardar el almacén: {str(error)}") from error
+            self._install_snapshot(snapshot)
+        return len(records)
     
-    def delete_password(self, entry_id):
+    def _wait_for_write(self):
+        """Espera (con el bloqueo adquirido) a que termine la escritura en curso"""
+        while self._writing:
+            self._write_done.wait()
+    
+    @synchronized
+    def compact(self):
         """
-        Elimina una entrada de contrasena
+        Compacta el diario en una nueva instantanea completa del almacen
         
-        Args:
-            entry_id (str): ID de la entrada a eliminar
-            
         Returns:
-            bool: True si se eliminó correctamente
+            bool: True si se compactó correctamente
         """
-        # Cargar datos si no están en memoria
         if self.data is None:
             self.load()
         
-        # Buscar y eliminar la entrada
-        for i, entry in enumerate(self.data["passwords"]):
-            if entry["id"] == entry_id:
-                # Eliminar de la lista
-                del self.data["passwords"][i]
-                
-                # Guardar cambios
-                self.save()
-                return True
+        print(f"DEBUG: Compactando {self.journal_records} registros del diario")
+        return self.save()
+    
+    @synchronized
+    def close(self):
+        """Guarda y compacta los cambios pendientes y libera los datos en memoria"""
+        # Guardar los cambios de la escritura diferida
+        if self._pending:
+            self.write_pending()
+        self._pending = None
+        self._notify_pending = None
         
-        return False
+        if self.data is not None and self.journal_records > 0:
+            self.compact()
+        if self.data is not None and self._search_sidecar_dirty:
+            self._save_search_sidecar()
+        self.data = None
+        self._positions = {}
+        self._sealed_records = {}
+        self._close_reader()
+        self.parallel_decryptor.shutdown()
+        self.entry_cache.clear()
+        self.search_index = None
+        self.journal_records = 0
     
-    def get_password(self, entry_id):
+    @contextmanager
+    def transaction(self):
         """
-        Obtiene una entrada de contrasena por ID
+        Agrupa varias modificaciones en una sola escritura
+        
+        Dentro del bloque, add_password, update_password y delete_password
+        solo modifican los datos en memoria; al salir se persisten todas a la
+        vez (un único registro del diario o un único guardado). Si el bloque
+        lanza una excepción, o falla la escritura, los datos en memoria
+        vuelven al estado anterior y el archivo no se modifica. Una
+        transacción anidada forma parte de la exterior.
+        
+        El bloqueo del almacén se mantiene durante todo el bloque.
+        
+        Yields:
+            PasswordVault: Este almacén
+        """
+        with self.lock:
+            if self._transaction is not None:
+                yield self
+                return
+            
+            # Cargar datos si no están en memoria
+            if self.data is None:
+                self.load()
+            
+            snapshot = (
+                list(self.data["passwords"]),
+                dict(self.data["metadata"]),
+                dict(self._sealed_records),
+                self._search_sidecar_dirty
+            )
+            self._transaction = []
+            try:
+                yield self
+                records, self._transaction = self._transaction, None
+                if records:
+                    self._commit_change({"op": "batch", "records": records})
+            except BaseException:
+                print("DEBUG: Transacción cancelada, se restauran los datos")
+                self._transaction = None
+                passwords, metadata, sealed_records, sidecar_dirty = snapshot
+                self.data["passwords"] = passwords
+                self.data["metadata"] = metadata
+                self._sealed_records = sealed_records
+                self._search_sidecar_dirty = sidecar_dirty
+                self._rebuild_index()
+                raise
+    
+    def _decrypt_records(self, body, version):
+        """
+        Descifra los registros de un contenedor versión 2 o posterior
+        
+        Un registro contiene los metadatos en JSON (el primero hasta la
+        versión 3 y el último desde la 4) y cada uno de los demás una entrada
+        codificada con vault_format.encode_entry. Desde la versión 4 los
+        metadatos incluyen el resumen de los registros de las entradas, que
+        debe coincidir con los leídos.
         
         Args:
-            entry_id (str): ID de la entrada
+            body (bytes): Registros tras la cabecera (sin la tabla de posiciones)
+            version (int): Versión del contenedor
             
         Returns:
-            dict: Datos descifrados de la entrada
+            tuple: (datos del almacén con los campos cifrados en bytes,
+                registro cifrado de cada entrada por ID)
             
         Raises:
-            ValueError: Si la entrada no existe
+            ValueError: Si algún registro no se puede descifrar o falta, sobra
+                o no es el guardado con los metadatos
         """
-        # Cargar datos si no están en memoria
-        if self.data is None:
-            self.load()
+        encrypted_records = vault_format.unpack_records(body)
+        records = self.auth_manager.decrypt_many_with_master_key(encrypted_records)
+        if not records or any(record is None for record in records):
+            raise ValueError("Registro del almacén dañado o clave maestra incorrecta")
         
-        # Buscar la entrada por ID
-        for entry in self.data["passwords"]:
-            if entry["id"] == entry_id:
-                # Descifrar y retornar
-                return self._decrypt_entry(entry)
+        if version >= vault_format.FORMAT_MANIFEST:
+            metadata = json.loads(records.pop().decode('utf-8'))
+            encrypted_records = encrypted_records[:-1]
+        else:
+            metadata = json.loads(records.pop(0).decode('utf-8'))
+            encrypted_records = encrypted_records[1:]
+        
+        passwords = [vault_format.decode_entry(record, ENTRY_FIELDS) for record in records]
         
-        # La entrada no existe
-        raise ValueError(f"No se encontró una entrada con ID '{entry_id}'")
+        summary = metadata.pop("records", None)
+        if version >= vault_format.FORMAT_MANIFEST:
+            manifest = vault_format.new_manifest()
+            for entry, encrypted_record in zip(passwords, encrypted_records):
+                vault_format.add_to_manifest(manifest, entry["id"], encrypted_record)
+            if summary != vault_format.manifest_summary(manifest):
+                raise ValueError("Los registros del almacén no coinciden con sus metadatos")
+        
+        vault_data = {
+            "metadata": metadata,
+            "passwords": passwords
+        }
+        sealed_records = {
+            entry["id"]: encrypted_record
+            for entry, encrypted_record in zip(passwords, encrypted_records)
+        }
+        return vault_data, sealed_records
     
-    def search_passwords(self, query):
+    def _decrypt_document(self, encrypted_data):
         """
-        Busca entradas que coincidan con el criterio
+        Descifra el documento JSON de los almacenes sin cabecera o versión 1
         
         Args:
-            query (str): Texto a buscar
+            encrypted_data (bytes): Documento cifrado
             
         Returns:
-            list: Entradas que coinciden
+            dict: Datos del almacén con los campos cifrados en bytes
         """
-        # Obtener todas las entradas descifradas
-        all_entries = self.get_all_passwords()
-        query = query.lower()
+        json_data = self.auth_manager.decrypt_with_master_key(encrypted_data)
         
-        # Filtrar por coincidencia en cualquier campo
-        results = []
-        for entry in all_entries:
-            if (query in entry.get("username", "").lower() or
-                query in entry.get("service", "").lower() or
-                query in entry.get("comment", "").lower()):
-                results.append(entry)
+        print(f"DEBUG: Datos descifrados exitosamente, longitud: {len(json_data)}")
         
-        return results
+        # Convertir de JSON a diccionario
+        vault_data = json.loads(json_data.decode('utf-8'))
+        vault_data["passwords"] = [
+            vault_format.entry_from_json(entry, ENTRY_FIELDS)
+            for entry in vault_data.get("passwords", [])
+        ]
+        
+        print("DEBUG: JSON decodificado correctamente")
+        return vault_data
     
-    def _encrypt_entry(self, entry_data, base_entry=None):
+    def _upgrade_container(self):
         """
-        Cifra los campos de una entrada
+        Reescribe un almacén con un contenedor anterior en la versión actual
+        
+        Solo se guarda si las claves de la sesión coinciden con los bloques de
+        comprobación de la cabecera, para no registrar una clave incorrecta.
+        
+        Returns:
+            bool: True si se reescribió el almacén
+        """
+        key_checks = self.header.get("key_checks")
+        if not key_checks or not self._keys_match(key_checks):
+            return False
+        
+        try:
+            print("DEBUG: Convirtiendo el almacén al contenedor de registros")
+            return self.save()
+        except Exception as e:
+            print(f"DEBUG: No se pudo convertir el almacén: {str(e)}")
+            return False
+    
+    def _open_reader(self):
+        """
+        Obtiene el lector de acceso aleatorio del archivo actual
+        
+        Returns:
+            VaultReader: Lector o None si el archivo no tiene tabla de posiciones
+                o el diario tiene cambios que el archivo no incluye
+        """
+        if os.path.exists(self.journal_path) and os.path.getsize(self.journal_path) > 0:
+            return None
+        
+        if self._reader is not None and self._reader.is_current():
+            return self._reader
+        
+        self._close_reader()
+        try:
+            self._reader = VaultReader(self.vault_path)
+        except Exception as e:
+            print(f"DEBUG: Sin acceso aleatorio al almacén: {str(e)}")
+            return None
+        
+        # Los registros usan el cifrado indicado en la cabecera
+        self.auth_manager.set_cipher(self._reader.header.get("cipher", CIPHER_CBC))
+        return self._reader
+    
+    def _close_reader(self):
+        """Libera la proyección del archivo si existe"""
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+    
+    def _read_entries(self, encrypted_records):
+        """
+        Descifra con la clave maestra registros sueltos del lector
         
         Args:
-            entry_data (dict): Datos a cifrar
-            base_entry (dict, opcional): Entrada base para mantener metadatos
+            encrypted_records (list): Tuplas (ID, registro cifrado)
             
         Returns:
-            dict: Entrada con campos cifrados
+            list: Entradas con los campos cifrados en bytes
+            
+        Raises:
+            ValueError: Si un registro está dañado o no corresponde a su ID
         """
-        # Usar base proporcionada o crear nueva
-        encrypted_entry = base_entry or {
-            "id": str(uuid.uuid4()),
-            "created_at": datetime.now().isoformat(),
-            "updated_at": datetime.now().isoformat()
-        }
+        records = self.auth_manager.decrypt_many_with_master_key(
+            [encrypted_record for _, encrypted_record in encrypted_records]
+        )
         
-        # Cifrar cada campo individual
-        for field in ["username", "service", "password", "comment"]:
-            if field in entry_data and entry_data[field]:
-                # Convertir a bytes
-                field_data = entry_data[field].encode('utf-8')
-                
-                # Cifrar con clave de datos
-                encrypted_field = self.auth_manager.encrypt_with_data_key(field_data)
-                
-                # Convertir a base64 para almacenamiento
-                encrypted_entry[field] = base64.b64encode(encrypted_field).decode('utf-8')
+        entries = []
+        for (entry_id, _), record in zip(encrypted_records, records):
+            if record is None:
+                raise ValueError("Registro del almacén dañado o clave maestra incorrecta")
+            entry = vault_format.decode_entry(record, ENTRY_FIELDS)
+            # La tabla está en claro: comprobar que apunta al registro correcto
+            if entry["id"] != entry_id:
+                raise ValueError("Tabla de posiciones del almacén dañada")
+            entries.append(entry)
+        return entries
+    
+    def _migrate_cipher(self):
+        """
+        Vuelve a cifrar todos los campos con el cifrado configurado y guarda
         
-        return encrypted_entry
+        Si algún campo no se puede descifrar (clave de datos incorrecta o dato
+        dañado) el almacén se deja como está para no perder información.
+        
+        Returns:
+            bool: True si se migró el almacén
+        """
+        source_cipher = self.auth_manager.get_cipher()
+        if source_cipher == CIPHER_AEAD and self.target_cipher == CIPHER_CBC:
+            # No se vuelve a un formato sin autenticación
+            return False
+        
+        print(f"DEBUG: Migrando el almacén de {source_cipher} a {self.target_cipher}")
+        passwords = self.data.get("passwords", [])
+        targets = [
+            (position, field)
+            for position, entry in enumerate(passwords)
+            for field in ENTRY_FIELDS
+            if entry.get(field)
+        ]
+        
+        contexts = [
+            vault_format.field_context(passwords[position]["id"], field)
+            for position, field in targets
+        ]
+        
+        try:
+            encrypted_fields = [passwords[position][field] for position, field in targets]
+            decrypted_fields = self.auth_manager.decrypt_many_with_data_key(encrypted_fields, contexts)
+            if any(decrypted is None for decrypted in decrypted_fields):
+                raise ValueError("Hay campos que no se pueden descifrar")
+            for decrypted in decrypted_fields:
+                decrypted.decode('utf-8')
+        except Exception as e:
+            print(f"DEBUG: Migración cancelada: {str(e)}")
+            return False
+        
+        if targets:
+            self._data_key_verified = True
+        
+        original_passwords = list(passwords)
+        try:
+            self.auth_manager.set_cipher(self.target_cipher)
+            reencrypted_fields = self.auth_manager.encrypt_many_with_data_key(decrypted_fields, contexts)
+            
+            migrated = [dict(entry) for entry in passwords]
+            for (position, field), encrypted_field in zip(targets, reencrypted_fields):
+                migrated[position][field] = encrypted_field
+            
+            self.data["passwords"] = migrated
+            self._sealed_records = {}
+            self._rebuild_index()
+            self.save()
+            return True
+        except Exception as e:
+            # Volver al estado anterior (el archivo no se modificó)
+            print(f"DEBUG: Error al migrar el almacén: {str(e)}")
+            self.auth_manager.set_cipher(source_cipher)
+            self.data["passwords"] = original_passwords
+            self._rebuild_index()
+            return False
     
-    def _decrypt_entry(self, encrypted_entry):
+    @synchronized
+    def verify_records(self):
         """
-        Descifra los campos de una entrada
+        Comprueba la autenticidad de cada campo cifrado sin descifrarlos
         
-        Args:
-            encrypted_entry (dict): Entrada con campos cifrados
+        Cada campo se comprueba con su entrada y su nombre, así que también se
+        detectan los campos trasladados a otra entrada o a otro campo.
+        
+        Returns:
+            list: Tuplas (ID, campo) de los campos dañados o manipulados
             
+        Raises:
+            ValueError: Si el almacén usa el formato CBC, que no autentica los campos
+        """
+        if self.data is None:
+            self.load()
+        
+        if self.auth_manager.get_cipher() != CIPHER_AEAD:
+            raise ValueError("El formato del almacén no permite verificar registros")
+        
+        damaged = []
+        for entry in self.data.get("passwords", []):
+            for field in ENTRY_FIELDS:
+                if entry.get(field):
+                    try:
+                        valid = self.auth_manager.verify_with_data_key(
+                            entry[field], vault_format.field_context(entry["id"], field)
+                        )
+                    except Exception:
+                        valid = False
+                    if not valid:
+                        damaged.append((entry["id"], field))
+        return damaged
+    
+    def _derived_keys(self):
+        """
+        Obtiene las claves derivadas por nombre de la cabecera
+        
         Returns:
-            dict: Entrada con campos descifrados
+            dict: Claves "master" y "data"
         """
-        decrypted_entry = {
-            "id": encrypted_entry["id"],
-            "created_at": encrypted_entry["created_at"],
-            "updated_at": encrypted_entry["updated_at"]
+        return {
+            "master": self.auth_manager.get_master_key(),
+            "data": self.auth_manager.get_data_key()
         }
+    
+    def _keys_match(self, key_checks):
+        """
+        Comprueba las claves de la sesión con los bloques de una cabecera
         
-        # Descifrar cada campo
-        for field in ["username", "service", "password", "comment"]:
-            if field in encrypted_entry and encrypted_entry[field]:
-                try:
-                    # Convertir de base64 a bytes
-                    encrypted_field = base64.b64decode(encrypted_entry[field])
-                    
-                    # Descifrar con clave de datos
-                    decrypted_field = self.auth_manager.decrypt_with_data_key(encrypted_field)
-                    
-                    # Convertir a texto
-                    decrypted_entry[field] = decrypted_field.decode('utf-8')
-                except Exception as e:
-                    print(f"Error al descifrar campo {field}: {str(e)}")
-                    decrypted_entry[field] = f"[Error: No se pudo descifrar]"
+        Solo se comprueban las claves que tienen bloque (ver test_keys).
         
-        return decrypted_entry
\ No newline at end of file
+        Args:
+            key_checks (dict): Bloques de comprobación por nombre de clave
+        
+        Returns:
+            bool: True si todas las claves con bloque son correctas
+        """
+        return all(
+            vault_format.verify_key_check(key, label, key_checks[label])
+            for label, key in self._derived_keys().items()
+            if label in key_checks
+        )
+    
+    def _check_data_key(self, passwords=None, samples=4):
+        """
+        Comprueba la clave de datos descifrando algunos campos del almacén
+        
+        Un relleno válido con una clave incorrecta es posible por azar, por lo
+        que se exigen varios campos con relleno y UTF-8 válidos antes de
+        registrar la clave en la cabecera.
+        
+        Args:
+            passwords (list, opcional): Entradas cifradas (por defecto las cargadas)
+            samples (int): Número de campos a descifrar
+        
+        Returns:
+            int: Número de campos descifrados (0 si el almacén no tiene campos)
+        
+        Raises:
+            ValueError: Si la clave de datos es incorrecta
+        """
+        if passwords is None:
+            passwords = self.data.get("passwords", [])
+        
+        checked = 0
+        for entry in passwords:
+            for field in ENTRY_FIELDS:
+                if entry.get(field):
+                    self.auth_manager.decrypt_with_data_key(
+                        entry[field], vault_format.field_context(entry["id"], field)
+                    ).decode('utf-8')
+                    checked += 1
+                    if checked >= samples:
+                        return checked
+        return checked
+    
+    def _commit_change(self, record):
+        """
+        Persiste una mutacion ya aplicada en memoria
+        
+        Dentro de una transacción o con la escritura diferida activa el cambio
+        solo se acumula; en otro caso se persiste de inmediato.
+        
+        Args:
+            record (dict): Operacion a registrar ("put" con la entrada cifrada,
+                "delete" con el ID o "batch" con varias operaciones)
+        """
+        # Dentro de una transacción el cambio se persiste al terminarla
+        if self._transaction is not None:
+            self._transaction.append(record)
+            return
+        
+        # Con escritura diferida el cambio se guarda más tarde (write_pending)
+        if self._pending is not None:
+            self._pending.append(record)
+            if self._notify_pending is not None:
+                self._notify_pending()
+            return
+        
+        self._persist_change(record)
+    
+    def _persist_change(self, record):
+        """
+        Escribe una mutacion en el diario o reescribe el almacen completo
+        
+        En modo diario solo se cifra y anexa el registro del cambio; en caso
+        contrario se reescribe el almacen completo.
+        
+        Una vez anexado el registro el cambio ya está guardado, así que un
+        fallo al compactar el diario solo se registra: el diario sigue siendo
+        válido y la compactación se reintenta con el siguiente cambio.
+        
+        Args:
+            record (dict): Operacion a registrar (ver _commit_change)
+        
+        Raises:
+            ValueError: Si el cambio no se pudo guardar
+        """
+        if not self.journal_enabled:
+            self.save()
+            return
+        
+        # Actualizar fecha de modificación
+        updated_at = datetime.now().isoformat()
+        self.data["metadata"]["updated_at"] = updated_at
+        record["updated_at"] = updated_at
+        
+        # Generación de la instantánea sobre la que se aplica el cambio
+        record["generation"] = self.data["metadata"].get("journal_generation", 0)
+        
+        self._append_journal(record)
+        
+        # Compactar si el diario ha crecido demasiado
+        if self.journal_records >= self.journal_compact_threshold:
+            try:
+                self.compact()
+            except ValueError as e:
+                print(f"DEBUG: No se pudo compactar el diario, se reintentará: {str(e)}")
+    
+    def _append_journal(self, record):
+        """
+        Anexa un registro cifrado con la clave maestra al diario
+        
+        Formato de cada registro: cabecera JOURNAL_FRAME (longitud y generación)
+        + registro cifrado. La generación también va dentro del registro
+        cifrado, y al leerlo debe coincidir con la de la cabecera.
+        
+        El registro se sincroniza con el disco antes de volver, de modo que el
+        cambio se puede dar por guardado.
+        
+        Args:
+            record (dict): Operacion a registrar
+            
+        Raises:
+            ValueError: Si hay un error al cifrar o escribir
+        """
+        try:
+            json_data = json.dumps(self._journal_json(record), ensure_ascii=False).encode('utf-8')
+            encrypted_record = self.auth_manager.encrypt_with_master_key(json_data)
+            
+            created = not os.path.exists(self.journal_path)
+            with open(self.journal_path, 'ab') as f:
+                f.write(JOURNAL_FRAME.pack(len(encrypted_record), record["generation"]) + encrypted_record)
+                f.flush()
+                os.fsync(f.fileno())
+            
+            # La entrada de un diario nuevo también debe llegar al disco
+            if created:
+                fsync_directory(os.path.dirname(os.path.abspath(self.journal_path)))
+            
+            self.journal_records += 1
+        except Exception as e:
+            print(f"DEBUG: Error en _append_journal(): {str(e)}")
+            print(traceback.format_exc())
+            raise ValueError(f"Error al escribir el diario: {str(e)}")
+    
+    def _journal_json(self, record):
+        """
+        Convierte un registro del diario a su forma JSON
+        
+        Las entradas del diario guardan los campos cifrados en base64.
+        
+        Args:
+            record (dict): Operacion a registrar
+            
+        Returns:
+            dict: Registro serializable
+        """
+        if record["op"] == "put":
+            return dict(record, entry=vault_format.entry_to_json(record["entry"], ENTRY_FIELDS))
+        if record["op"] == "batch":
+            return dict(record, records=[self._journal_json(item) for item in record["records"]])
+        return record
+    
+    def _replay_journal(self):
+        """
+        Aplica sobre self.data los registros del diario en orden
+        
+        Cada registro lleva en su cabecera la generación de la instantánea
+        sobre la que se escribió. Los de generaciones anteriores a la cargada
+        ya están en ella (el guardado se interrumpió antes de eliminar el
+        diario) y se descartan sin descifrarlos: volver a aplicarlos desharía
+        cambios posteriores, y pueden estar cifrados con un cifrado anterior
+        si ese guardado migró el almacén.
+        
+        Un registro final incompleto o que no se puede descifrar (escritura
+        interrumpida, o relleno de ceros tras un corte de corriente) se
+        descarta y el diario se recorta tras el último registro válido, para
+        que los siguientes cambios no queden detrás de él. Un registro dañado
+        seguido de otros válidos sí es un error.
+        
+        Raises:
+            ValueError: Si un registro intermedio está dañado
+        """
+        self.journal_records = 0
+        
+        if not os.path.exists(self.journal_path):
+            return
+        
+        generation = self.data["metadata"].get("journal_generation", 0)
+        skipped = 0
+        
+        with open(self.journal_path, 'rb') as f:
+            journal_data = f.read()
+        
+        offset = 0
+        while offset + JOURNAL_FRAME.size <= len(journal_data):
+            length, record_generation = JOURNAL_FRAME.unpack_from(journal_data, offset)
+            start = offset + JOURNAL_FRAME.size
+            if start + length > len(journal_data):
+                print("DEBUG: Registro final del diario incompleto, se ignora")
+                break
+            
+            try:
+                # Los registros ya guardados solo pueden preceder a los nuevos
+                applied = self.journal_records - skipped
+                if length == 0 or record_generation > generation or (record_generation < generation and applied):
+                    raise ValueError("Cabecera de registro no válida")
+                
+                record = None
+                if record_generation == generation:
+                    encrypted_record = journal_data[start:start + length]
+                    record = json.loads(self.auth_manager.decrypt_with_master_key(encrypted_record).decode('utf-8'))
+                    if record.get("generation") != record_generation:
+                        raise ValueError("La generación del registro no coincide con su cabecera")
+            except Exception as e:
+                # Solo la escritura del último registro puede haberse interrumpido
+                if journal_data[start + length:].strip(b"\0"):
+                    raise ValueError(f"Registro del diario dañado: {str(e)}")
+                print(f"DEBUG: Registro final del diario dañado, se descarta: {str(e)}")
+                break
+            
+            if record is None:
+                skipped += 1
+            else:
+                self._apply_journal_record(record)
+            
+            offset = start + length
+            self.journal_records += 1
+        
+        if offset < len(journal_data):
+            self._cut_journal(offset)
+        
+        print(f"DEBUG: Aplicados {self.journal_records - skipped} registros del diario ({skipped} ya guardados)")
+    
+    def _cut_journal(self, length):
+        """
+        Recorta el diario tras su último registro válido
+        
+        Args:
+            length (int): Longitud de los registros válidos
+        """
+        try:
+            with open(self.journal_path, 'r+b') as f:
+                f.truncate(length)
+                f.flush()
+                os.fsync(f.fileno())
+        except OSError as e:
+            print(f"DEBUG: No se pudo recortar el diario: {str(e)}")
+    
+    def _apply_journal_record(self, record):
+        """
+        Aplica un registro del diario a los datos en memoria
+        
+        Args:
+            record (dict): Operacion registrada
+        """
+        if record["op"] == "put":
+            self._put_entry(vault_format.entry_from_json(record["entry"], ENTRY_FIELDS))
+        elif record["op"] == "delete":
+            self._remove_entry(record["id"])
+        elif record["op"] == "batch":
+            for item in record["records"]:
+                self._apply_journal_record(item)
+        
+        if "updated_at" in record:
+            self.data["metadata"]["updated_at"] = record["updated_at"]
+    
+    def _rebuild_index(self):
+        """Reconstruye el indice de posiciones a partir de self.data"""
+        self._mutations += 1
+        self.entry_cache.clear()
+        self.search_index = None
+        self._positions = {
+            entry["id"]: i for i, entry in enumerate(self.data.get("passwords", []))
+        }
+    
+    def _put_entry(self, entry):
+        """
+        Inserta o reemplaza una entrada cifrada manteniendo el indice
+        
+        Args:
+            entry (dict): Entrada cifrada
+        """
+        passwords = self.data["passwords"]
+        position = self._positions.get(entry["id"])
+        self.entry_cache.invalidate(entry["id"])
+        self._sealed_records.pop(entry["id"], None)
+        self._mutations += 1
+        
+        if position is None:
+            self._positions[entry["id"]] = len(passwords)
+            passwords.append(entry)
+        else:
+            passwords[position] = entry
+    
+    def _remove_entry(self, entry_id):
+        """
+        Elimina una entrada en tiempo constante
+        
+        La ultima entrada de la lista ocupa el hueco de la eliminada, por lo que
+        el orden en disco no se conserva (la interfaz ordena por su cuenta).
+        
+        Args:
+            entry_id (str): ID de la entrada
+            
+        Returns:
+            bool: True si la entrada existia
+        """
+        position = self._positions.pop(entry_id, None)
+        self.entry_cache.invalidate(entry_id)
+        self._sealed_records.pop(entry_id, None)
+        self._mutations += 1
+        if position is None:
+            return False
+        
+        passwords = self.data["passwords"]
+        last = passwords.pop()
+        if position < len(passwords):
+            passwords[position] = last
+            self._positions[last["id"]] = position
+        
+        return True
+    
+    def _find_entry(self, entry_id):
+        """
+        Obtiene la entrada cifrada por ID
+        
+        Args:
+            entry_id (str): ID de la entrada
+            
+        Returns:
+            dict: Entrada cifrada o None si no existe
+        """
+        position = self._positions.get(entry_id)
+        if position is None:
+            return None
+        return self.data["passwords"][position]
+    
+    def _truncate_journal(self):
+        """Elimina el diario tras escribir una instantanea completa"""
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+        self.journal_records = 0
+    
+    # El resto del código permanece igual...
+    @synchronized
+    def get_all_passwords(self, lazy_fields=LAZY_FIELDS):
+        """
+        Obtiene todas las entradas de contrasenas
+        
+        Args:
+            lazy_fields (tuple): Campos cuyo descifrado se difiere hasta el
+                primer acceso. Una tupla vacía descifra todo inmediatamente.
+                Si el índice de búsqueda ya existe, los campos indexados se
+                toman de él y el resto se difiere.
+        
+        Returns:
+            list: Lista de entradas descifradas (LazyEntry)
+        """
+        decrypted_entries = []
+        for batch in self.iter_password_batches(lazy_fields=lazy_fields):
+            decrypted_entries.extend(batch)
+        return decrypted_entries
+    
+    @synchronized
+    def count_passwords(self):
+        """
+        Obtiene el número de entradas del almacén
+        
+        Returns:
+            int: Número de entradas
+        """
+        # Sin el almacén en memoria basta con la tabla de posiciones
+        if self.data is None:
+            reader = self._open_reader()
+            if reader is not None:
+                return len(reader)
+            self.load()
+        return len(self.data.get("passwords", []))
+    
+    def iter_password_batches(self, batch_size=500, lazy_fields=LAZY_FIELDS):
+        """
+        Obtiene las entradas descifradas por lotes
+        
+        Pensado para la carga en segundo plano: descifra sobre una copia de la
+        lista de entradas sin mantener el bloqueo del almacén entre lotes, de
+        modo que la interfaz puede seguir usándolo. El índice de búsqueda
+        construido durante el recorrido solo se instala si el almacén no cambió.
+        
+        Args:
+            batch_size (int): Entradas por lote
+            lazy_fields (tuple): Campos cuyo descifrado se difiere (ver get_all_passwords)
+            
+        Yields:
+            list: Lote de entradas (LazyEntry)
+        """
+        build_index = not set(SEARCH_FIELDS) & set(lazy_fields)
+        
+        with self.lock:
+            # Cargar datos si no están en memoria
+            if self.data is None:
+                self.load()
+            
+            # Intentar recuperar el índice persistente antes de descifrar
+            if build_index and self.search_index is None:
+                self._load_search_sidecar()
+            
+            # Con el índice construido los campos visibles ya están en memoria
+            if self.search_index is not None:
+                indexed = [self._indexed_entry(entry) for entry in self.data.get("passwords", [])]
+            else:
+                indexed = None
+                snapshot = list(self.data.get("passwords", []))
+                mutations = self._mutations
+        
+        if indexed is not None:
+            for start in range(0, len(indexed), batch_size):
+                yield indexed[start:start + batch_size]
+            return
+        
+        # Aprovechar el descifrado para construir el índice de búsqueda
+        search_index = SearchIndex() if build_index else None
+        
+        chunks = [snapshot[start:start + batch_size] for start in range(0, len(snapshot), batch_size)]
+        
+        # Repartir los lotes entre varios procesos en almacenes grandes
+        if self.parallel_decryptor.should_use(len(snapshot)):
+            print(f"DEBUG: Descifrando {len(snapshot)} entradas en paralelo")
+            batches = self._parallel_lazy_batches(chunks, lazy_fields)
+        else:
+            # Descifrar los campos inmediatos de cada lote en una pasada
+            batches = (self._lazy_entries(chunk, lazy_fields) for chunk in chunks)
+        
+        for batch in batches:
+            if search_index is not None:
+                for decrypted_entry in batch:
+                    search_index.add(decrypted_entry["id"], decrypted_entry)
+            
+            yield batch
+        
+        if search_index is not None:
+            with self.lock:
+                if self.search_index is None and (
+                    self._mutations == mutations or self._reconcile_index(search_index, snapshot, batch_size)
+                ):
+                    self.search_index = search_index
+                    self._save_search_sidecar()
+    
+    def _reconcile_index(self, search_index, snapshot, limit):
+        """
+        Incorpora a un índice los cambios hechos mientras se construía
+        
+        Las entradas no se modifican sino que se reemplazan, así que las que
+        cambiaron son las que ya no son el mismo objeto que en la copia
+        recorrida. Solo se descifran esas; si son demasiadas (por ejemplo,
+        porque el almacén se volvió a cargar) el índice se descarta.
+        
+        Args:
+            search_index (SearchIndex): Índice construido sobre la copia
+            snapshot (list): Entradas cifradas recorridas
+            limit (int): Máximo de entradas a descifrar
+            
+        Returns:
+            bool: True si el índice quedó al día
+        """
+        previous = {entry["id"]: entry for entry in snapshot}
+        current = self.data.get("passwords", [])
+        changed = [entry for entry in current if previous.get(entry["id"]) is not entry]
+        if len(changed) > limit:
+            return False
+        
+        current_ids = {entry["id"] for entry in current}
+        for entry_id in previous:
+            if entry_id not in current_ids:
+                search_index.remove(entry_id)
+        
+        lazy_fields = tuple(field for field in ENTRY_FIELDS if field not in SEARCH_FIELDS)
+        for decrypted_entry in self._lazy_entries(changed, lazy_fields):
+            search_index.add(decrypted_entry["id"], decrypted_entry)
+        return True
+    
+    @synchronized
+    def get_list_entry(self, entry_id, lazy_fields=LAZY_FIELDS):
+        """
+        Obtiene una entrada tal como la entrega el listado (get_all_passwords)
+        
+        Permite a la interfaz actualizar la fila de una entrada modificada sin
+        volver a recorrer el almacén.
+        
+        Args:
+            entry_id (str): ID de la entrada
+            lazy_fields (tuple): Campos cuyo descifrado se difiere (ver get_all_passwords)
+            
+        Returns:
+            LazyEntry: Entrada o None si no existe
+        """
+        # Cargar datos si no están en memoria
+        if self.data is None:
+            self.load()
+        
+        entry = self._find_entry(entry_id)
+        if entry is None:
+            return None
+        if self.search_index is not None and entry_id in self.search_index:
+            return self._indexed_entry(entry)
+        return self._lazy_entries([entry], lazy_fields)[0]
+    
+    @synchronized
+    def add_password(self, entry_data):
+        """
+        Agrega una nueva entrada de contrasena
+        
+        Args:
+            entry_data (dict): Datos de la entrada
+            
+        Returns:
+            str: ID de la entrada creada
+        """
+        # Cargar datos si no están en memoria
+        if self.data is None:
+            self.load()
+        
+        # Generar ID único
+        entry_id = str(uuid.uuid4())
+        
+        # Crear estructura de entrada
+        entry = {
+            "id": entry_id,
+            "created_at": datetime.now().isoformat(),
+            "updated_at": datetime.now().isoformat()
+        }
+        
+        # Cifrar campos con la clave de datos
+        encrypted_entry = self._encrypt_entry(entry_data, entry)
+        
+        # Agregar a la lista de contraseñas
+        self._put_entry(encrypted_entry)
+        if self.search_index is not None:
+            self.search_index.add(entry_id, entry_data)
+            self._search_sidecar_dirty = True
+        
+        # Guardar cambios
+        self._commit_change({"op": "put", "entry": encrypted_entry})
+        
+        return entry_id
+    
+    @synchronized
+    def update_password(self, entry_id, entry_data):
+        """
+        Actualiza una entrada existente
+        
+        Args:
+            entry_id (str): ID de la entrada a actualizar
+            entry_data (dict): Nuevos datos
+            
+        Returns:
+            bool: True si se actualizó correctamente
+            
+        Raises:
+            ValueError: Si la entrada no existe
+        """
+        # Cargar datos si no están en memoria
+        if self.data is None:
+            self.load()
+        
+        # Buscar la entrada por ID
+        entry = self._find_entry(entry_id)
+        if entry is None:
+            # La entrada no existe
+            raise ValueError(f"No se encontró una entrada con ID '{entry_id}'")
+        
+        # Cifrar solo los campos cuyo valor cambia (el resto conserva su cifrado)
+        changed = self._changed_fields(entry, entry_data)
+        if not changed:
+            return True
+        
+        # Mantener datos originales que no se deben cambiar
+        original = entry.copy()
+        original["updated_at"] = datetime.now().isoformat()
+        
+        # Cifrar nuevos datos
+        updated_entry = self._encrypt_entry(changed, original)
+        
+        # Actualizar entrada
+        self._put_entry(updated_entry)
+        if self.search_index is not None:
+            # Indexar los valores resultantes: los campos vacíos conservan el anterior
+            indexed = dict(self.search_index.fields(entry_id)) if entry_id in self.search_index else {}
+            indexed.update(changed)
+            self.search_index.add(entry_id, indexed)
+            self._search_sidecar_dirty = True
+        
+        # Guardar cambios
+        self._commit_change({"op": "put", "entry": updated_entry})
+        return True
+    
+    @synchronized
+    def delete_password(self, entry_id):
+        """
+        Elimina una entrada de contrasena
+        
+        Args:
+            entry_id (str): ID de la entrada a eliminar
+            
+        Returns:
+            bool: True si se eliminó correctamente
+        """
+        # Cargar datos si no están en memoria
+        if self.data is None:
+            self.load()
+        
+        # Buscar y eliminar la entrada
+        if not self._remove_entry(entry_id):
+            return False
+        if self.search_index is not None:
+            self.search_index.remove(entry_id)
+            self._search_sidecar_dirty = True
+        
+        # Guardar cambios
+        self._commit_change({"op": "delete", "id": entry_id})
+        return True
+    
+    @synchronized
+    def get_password(self, entry_id):
+        """
+        Obtiene una entrada de contrasena por ID
+        
+        Args:
+            entry_id (str): ID de la entrada
+            
+        Returns:
+            dict: Datos descifrados de la entrada
+            
+        Raises:
+            ValueError: Si la entrada no existe
+        """
+        # Reutilizar la entrada si ya se descifró recientemente
+        cached = self.entry_cache.get(entry_id)
+        if cached is not None:
+            return cached
+        
+        # Sin el almacén en memoria, descifrar solo el registro de la entrada
+        reader = self._open_reader() if self.data is None else None
+        if reader is not None:
+            encrypted_record = reader.record(entry_id)
+            entry = self._read_entries([(entry_id, encrypted_record)])[0] if encrypted_record else None
+        else:
+            # Cargar datos si no están en memoria
+            if self.data is None:
+                self.load()
+            
+            # Buscar la entrada por ID
+            entry = self._find_entry(entry_id)
+        
+        if entry is None:
+            # La entrada no existe
+            raise ValueError(f"No se encontró una entrada con ID '{entry_id}'")
+        
+        # Descifrar, guardar en cache y retornar
+        decrypted_entry = self._decrypt_entry(entry)
+        self.entry_cache.put(entry_id, decrypted_entry)
+        return decrypted_entry
+    
+    @synchronized
+    def get_passwords_page(self, start, count, lazy_fields=LAZY_FIELDS):
+        """
+        Obtiene un tramo de entradas en el orden del almacén
+        
+        Si el almacén no está en memoria solo se descifran los registros del
+        tramo, leídos con la tabla de posiciones.
+        
+        Args:
+            start (int): Posición de la primera entrada
+            count (int): Número máximo de entradas
+            lazy_fields (tuple): Campos cuyo descifrado se difiere (ver get_all_passwords)
+            
+        Returns:
+            list: Entradas (LazyEntry)
+        """
+        reader = self._open_reader() if self.data is None else None
+        if reader is not None:
+            encrypted_entries = self._read_entries(reader.records(start, start + count))
+        else:
+            # Cargar datos si no están en memoria
+            if self.data is None:
+                self.load()
+            encrypted_entries = self.data.get("passwords", [])[start:start + count]
+        
+        return self._lazy_entries(encrypted_entries, lazy_fields)
+    
+    def search_passwords(self, query):
+        """
+        Busca entradas que coincidan con el criterio
+        
+        Args:
+            query (str): Texto a buscar
+            
+        Returns:
+            list: Entradas que coinciden
+        """
+        # Construir el índice sin el bloqueo del almacén (ver ensure_search_index)
+        self.ensure_search_index()
+        
+        with self.lock:
+            # Cargar datos si no están en memoria
+            if self.data is None:
+                self.load()
+            
+            # El almacén cambió demasiado mientras se construía: construirlo con el bloqueo
+            if self.search_index is None:
+                self.get_all_passwords(lazy_fields=LAZY_FIELDS)
+            
+            # Consultar el índice (no requiere descifrar)
+            matches = self.search_index.search(query)
+            
+            # Mantener el orden del almacén
+            return [
+                self._indexed_entry(self._find_entry(entry_id))
+                for entry_id in sorted(matches, key=self._positions.__getitem__)
+            ]
+    
+    def ensure_search_index(self):
+        """
+        Carga o construye el índice de búsqueda si aún no existe
+        
+        Construirlo descifra todo el almacén, así que se hace como en
+        iter_password_batches: sobre una copia de las entradas y sin mantener
+        el bloqueo, de modo que el resto de operaciones no esperan a la
+        primera búsqueda. Si el almacén cambia demasiado entretanto, el
+        índice no se instala (ver _reconcile_index).
+        """
+        with self.lock:
+            # Cargar datos si no están en memoria
+            if self.data is None:
+                self.load()
+            if self.search_index is not None or self._load_search_sidecar():
+                return
+        
+        print("DEBUG: Construyendo índice de búsqueda")
+        for _ in self.iter_password_batches(lazy_fields=LAZY_FIELDS):
+            pass
+    
+    def _load_search_sidecar(self):
+        """
+        Carga el índice de búsqueda persistente si corresponde al almacén actual
+        
+        El índice se descarta si no existe, no se puede descifrar con la clave
+        de datos o su versión no coincide con la fecha de modificación del almacén.
+        
+        Returns:
+            bool: True si se cargó el índice
+        """
+        if not self.search_sidecar_enabled or not os.path.exists(self.search_sidecar_path):
+            return False
+        
+        try:
+            with open(self.search_sidecar_path, 'rb') as f:
+                encrypted_data = f.read()
+            
+            sidecar = json.loads(self.auth_manager.decrypt_with_data_key(encrypted_data).decode('utf-8'))
+            
+            if (sidecar.get("version") != SEARCH_SIDECAR_VERSION or
+                    sidecar.get("vault_updated_at") != self.data["metadata"]["updated_at"] or
+                    len(sidecar["entries"]) != len(self._positions) or
+                    not all(entry_id in self._positions for entry_id in sidecar["entries"])):
+                print("DEBUG: Índice de búsqueda persistente obsoleto")
+                return False
+            
+            search_index = SearchIndex()
+            for entry_id, fields in sidecar["entries"].items():
+                search_index.add(entry_id, fields)
+            
+            self.search_index = search_index
+            self._search_sidecar_dirty = False
+            print(f"DEBUG: Índice de búsqueda cargado con {len(search_index)} entradas")
+            return True
+            
+        except Exception as e:
+            print(f"DEBUG: No se pudo cargar el índice de búsqueda: {str(e)}")
+            return False
+    
+    def _save_search_sidecar(self):
+        """Guarda el índice de búsqueda cifrado con la clave de datos"""
+        if not self.search_sidecar_enabled or self.search_index is None:
+            return
+        
+        try:
+            sidecar = {
+                "version": SEARCH_SIDECAR_VERSION,
+                "vault_updated_at": self.data["metadata"]["updated_at"],
+                "entries": {
+                    entry_id: self.search_index.fields(entry_id)
+                    for entry_id in self._positions
+                }
+            }
+            json_data = json.dumps(sidecar, ensure_ascii=False).encode('utf-8')
+            encrypted_data = self.auth_manager.encrypt_with_data_key(json_data)
+            
+            write_atomic(self.search_sidecar_path, [encrypted_data])
+            
+            self._search_sidecar_dirty = False
+        except Exception as e:
+            # El índice persistente es opcional: se reconstruirá en la próxima carga
+            print(f"DEBUG: No se pudo guardar el índice de búsqueda: {str(e)}")
+    
+    def _indexed_entry(self, encrypted_entry):
+        """
+        Crea una entrada del listado a partir de los campos del índice
+        
+        Args:
+            encrypted_entry (dict): Entrada cifrada (indexada)
+            
+        Returns:
+            LazyEntry: Entrada cuyos campos no indexados se descifran al accederlos
+        """
+        values = {
+            "id": encrypted_entry["id"],
+            "created_at": encrypted_entry["created_at"],
+            "updated_at": encrypted_entry["updated_at"]
+        }
+        for field, value in self.search_index.fields(encrypted_entry["id"]).items():
+            if value:
+                values[field] = value
+        
+        pending = {
+            field: encrypted_entry[field]
+            for field in ENTRY_FIELDS
+            if field not in SEARCH_FIELDS and encrypted_entry.get(field)
+        }
+        
+        return LazyEntry(values, pending, self._deferred_field)
+    
+    def _changed_fields(self, entry, entry_data):
+        """
+        Determina qué campos de una actualización cambian su valor
+        
+        El valor actual se toma en claro de la cache de entradas o del índice
+        de búsqueda, sin descifrar nada; un campo sin copia en claro se
+        considera modificado. Los campos vacíos no se actualizan (se conserva
+        el valor anterior), igual que en _encrypt_entry.
+        
+        Args:
+            entry (dict): Entrada cifrada actual
+            entry_data (dict): Nuevos datos
+            
+        Returns:
+            dict: Campos que cambian con su nuevo valor
+        """
+        current = self.entry_cache.get(entry["id"]) or {}
+        if not current and self.search_index is not None and entry["id"] in self.search_index:
+            current = self.search_index.fields(entry["id"])
+        
+        return {
+            field: entry_data[field]
+            for field in ENTRY_FIELDS
+            if entry_data.get(field) and not (
+                entry.get(field) and field in current and current[field] == entry_data[field]
+            )
+        }
+    
+    def _encrypt_entry(self, entry_data, base_entry=None):
+        """
+        Cifra los campos de una entrada
+        
+        Args:
+            entry_data (dict): Datos a cifrar
+            base_entry (dict, opcional): Entrada base para mantener metadatos
+            
+        Returns:
+            dict: Entrada con campos cifrados
+        """
+        # Usar base proporcionada o crear nueva
+        encrypted_entry = base_entry or {
+            "id": str(uuid.uuid4()),
+            "created_at": datetime.now().isoformat(),
+            "updated_at": datetime.now().isoformat()
+        }
+        
+        # Cifrar los campos con la clave de datos en una sola pasada, vinculados a la entrada
+        fields = [field for field in ENTRY_FIELDS if field in entry_data and entry_data[field]]
+        encrypted_fields = self.auth_manager.encrypt_many_with_data_key(
+            [entry_data[field].encode('utf-8') for field in fields],
+            [vault_format.field_context(encrypted_entry["id"], field) for field in fields]
+        )
+        
+        for field, encrypted_field in zip(fields, encrypted_fields):
+            encrypted_entry[field] = encrypted_field
+        
+        return encrypted_entry
+    
+    def _decrypt_entry(self, encrypted_entry):
+        """
+        Descifra los campos de una entrada
+        
+        Args:
+            encrypted_entry (dict): Entrada con campos cifrados
+            
+        Returns:
+            dict: Entrada con campos descifrados
+        """
+        return dict(self._lazy_entries([encrypted_entry], lazy_fields=())[0])
+    
+    def _lazy_entries(self, encrypted_entries, lazy_fields=LAZY_FIELDS):
+        """
+        Crea entradas que descifran algunos campos solo al accederlos
+        
+        Los campos inmediatos de todas las entradas se descifran juntos con
+        una sola llamada al descifrado por lotes.
+        
+        Args:
+            encrypted_entries (list): Entradas con campos cifrados
+            lazy_fields (tuple): Campos cuyo descifrado se difiere
+            
+        Returns:
+            list: Entradas (LazyEntry) con los campos restantes ya descifrados
+        """
+        entries, targets, encrypted_values = self._plan_lazy_entries(encrypted_entries, lazy_fields)
+        decrypted_values = self._decrypt_fields(targets, encrypted_values)
+        return self._build_lazy_entries(entries, targets, decrypted_values)
+    
+    def _plan_lazy_entries(self, encrypted_entries, lazy_fields):
+        """
+        Separa los campos que se descifran de inmediato de los diferidos
+        
+        Args:
+            encrypted_entries (list): Entradas con campos cifrados
+            lazy_fields (tuple): Campos cuyo descifrado se difiere
+            
+        Returns:
+            tuple: (entradas como (valores, pendientes), destinos (valores, campo),
+                valores cifrados de cada destino)
+        """
+        entries = []
+        targets = []  # (valores de la entrada, campo) por cada campo a descifrar
+        encrypted_values = []
+        
+        for encrypted_entry in encrypted_entries:
+            values = {
+                "id": encrypted_entry["id"],
+                "created_at": encrypted_entry["created_at"],
+                "updated_at": encrypted_entry["updated_at"]
+            }
+            pending = {}
+            
+            for field in ENTRY_FIELDS:
+                if field in encrypted_entry and encrypted_entry[field]:
+                    if field in lazy_fields:
+                        pending[field] = encrypted_entry[field]
+                    else:
+                        targets.append((values, field))
+                        encrypted_values.append(encrypted_entry[field])
+            
+            entries.append((values, pending))
+        
+        return entries, targets, encrypted_values
+    
+    def _build_lazy_entries(self, entries, targets, decrypted_values):
+        """
+        Completa las entradas planificadas con los valores descifrados
+        
+        Args:
+            entries (list): Entradas como (valores, pendientes)
+            targets (list): Destino (valores, campo) de cada valor descifrado
+            decrypted_values (list): Valores descifrados o marcadores de error
+            
+        Returns:
+            list: Entradas (LazyEntry)
+        """
+        for (values, field), value in zip(targets, decrypted_values):
+            values[field] = value
+        
+        return [LazyEntry(values, pending, self._deferred_field) for values, pending in entries]
+    
+    def _parallel_lazy_batches(self, chunks, lazy_fields):
+        """
+        Crea los lotes de entradas descifrando en varios procesos
+        
+        Todos los lotes se envían a la vez y se entregan en orden conforme
+        terminan. Si los procesos fallan, el resto se descifra en este hilo.
+        
+        Args:
+            chunks (list): Lotes de entradas cifradas
+            lazy_fields (tuple): Campos cuyo descifrado se difiere
+            
+        Yields:
+            list: Lote de entradas (LazyEntry)
+        """
+        plans = [self._plan_lazy_entries(chunk, lazy_fields) for chunk in chunks]
+        try:
+            results = self.parallel_decryptor.map(
+                self.auth_manager.get_cipher(),
+                self.auth_manager.get_data_key(),
+                [encrypted_values for _, _, encrypted_values in plans],
+                [self._field_contexts(targets) for _, targets, _ in plans]
+            )
+        except Exception as e:
+            print(f"DEBUG: No se pudo iniciar el descifrado en paralelo: {str(e)}")
+            results = None
+        
+        for entries, targets, encrypted_values in plans:
+            fields = [field for _, field in targets]
+            
+            if results is not None:
+                try:
+                    decrypted_values = self._field_values(fields, next(results))
+                except Exception as e:
+                    print(f"DEBUG: Error en el descifrado en paralelo: {str(e)}")
+                    self.parallel_decryptor.shutdown()
+                    results = None
+            
+            if results is None:
+                decrypted_values = self._decrypt_fields(targets, encrypted_values)
+            
+            yield self._build_lazy_entries(entries, targets, decrypted_values)
+    
+    def _decrypt_fields(self, targets, encrypted_values):
+        """
+        Descifra varios campos en una sola pasada
+        
+        Args:
+            targets (list): Destino (valores de la entrada, campo) de cada valor
+            encrypted_values (list): Valores cifrados
+            
+        Returns:
+            list: Valores descifrados o marcadores de error
+        """
+        # Descifrar con clave de datos (un valor dañado no detiene el lote)
+        decrypted_fields = self.auth_manager.decrypt_many_with_data_key(
+            encrypted_values, self._field_contexts(targets)
+        )
+        
+        # Convertir a texto
+        texts = []
+        for decrypted_field in decrypted_fields:
+            try:
+                texts.append(decrypted_field.decode('utf-8') if decrypted_field is not None else None)
+            except UnicodeDecodeError:
+                texts.append(None)
+        
+        return self._field_values([field for _, field in targets], texts)
+    
+    def _field_contexts(self, targets):
+        """
+        Obtiene el contexto de cifrado de cada campo planificado
+        
+        Args:
+            targets (list): Destino (valores de la entrada, campo) de cada valor
+            
+        Returns:
+            list: Contextos (ver vault_format.field_context)
+        """
+        return [vault_format.field_context(values["id"], field) for values, field in targets]
+    
+    def _field_values(self, fields, texts):
+        """
+        Sustituye los campos que no se pudieron descifrar por el marcador de error
+        
+        Args:
+            fields (list): Nombre de cada campo (para mensajes de error)
+            texts (list): Textos descifrados o None
+            
+        Returns:
+            list: Valores descifrados o marcadores de error
+        """
+        results = []
+        for field, text in zip(fields, texts):
+            if text is None:
+                print(f"Error al descifrar campo {field}: Error al descifrar datos. Clave incorrecta.")
+                text = f"[Error: No se pudo descifrar]"
+            results.append(text)
+        return results
+    
+    def _deferred_field(self, entry_id, field, encrypted_value):
+        """
+        Obtiene un campo diferido de una entrada del listado
+        
+        El campo se toma de la entrada completa que devuelve get_password, de
+        modo que el texto en claro queda en la cache de entradas (con su
+        caducidad, su límite y su borrado) y no en el listado. Si la entrada ya
+        no existe se descifra el valor que tenía el listado.
+        
+        Args:
+            entry_id (str): ID de la entrada
+            field (str): Nombre del campo
+            encrypted_value (bytes): Valor cifrado del listado
+            
+        Returns:
+            str: Valor descifrado o marcador de error
+        """
+        try:
+            return self.get_password(entry_id).get(field, "")
+        except ValueError:
+            return self._decrypt_field(entry_id, field, encrypted_value)
+    
+    def _decrypt_field(self, entry_id, field, encrypted_value):
+        """
+        Descifra un campo individual
+        
+        Args:
+            entry_id (str): ID de la entrada del campo
+            field (str): Nombre del campo
+            encrypted_value (bytes): Valor cifrado
+            
+        Returns:
+            str: Valor descifrado o marcador de error
+        """
+        try:
+            # Descifrar con clave de datos
+            decrypted_field = self.auth_manager.decrypt_with_data_key(
+                encrypted_value, vault_format.field_context(entry_id, field)
+            )
+            
+            # Convertir a texto
+            return decrypted_field.decode('utf-8')
+        except Exception as e:
+            print(f"Error al descifrar campo {field}: {str(e)}")
+            return f"[Error: No se pudo descifrar]"
\ No newline at end of file
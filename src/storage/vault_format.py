@@ -0,0 +1,511 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Formato del archivo del almacen: cabecera en claro y registros cifrados
+"""
+
+import os
+import hmac
+import json
+import base64
+import struct
+import hashlib
+
+# Identificador del archivo con cabecera (los almacenes anteriores no lo tienen)
+MAGIC = b"PMVAULT"
+
+# Versiones del contenedor:
+#   1 = cabecera + documento JSON cifrado (campos en base64)
+#   2 = cabecera + registros binarios cifrados (campos en bytes)
+#   3 = versión 2 + tabla de posiciones de las entradas al final
+#   4 = versión 3 con los metadatos tras las entradas y el resumen de sus registros
+FORMAT_JSON = 1
+FORMAT_RECORDS = 2
+FORMAT_INDEXED = 3
+FORMAT_MANIFEST = 4
+FORMAT_VERSION = FORMAT_MANIFEST
+
+# Prefijo: identificador + version (1 byte) + longitud de la cabecera (4 bytes, big endian)
+PREFIX = struct.Struct(">7sBI")
+
+# Tamaño máximo aceptado para la cabecera JSON
+MAX_HEADER_SIZE = 64 * 1024
+
+# Claves comprobadas por la cabecera
+KEY_LABELS = ("master", "data")
+
+# Longitud de cada registro del contenedor (4 bytes, big endian)
+RECORD_LENGTH = struct.Struct(">I")
+
+# Longitud de los textos (2 bytes) y de los campos cifrados (4 bytes) de una entrada
+TEXT_LENGTH = struct.Struct(">H")
+FIELD_LENGTH = struct.Struct(">I")
+
+# Datos en claro de cada entrada, en el orden en que se codifican
+ENTRY_TEXTS = ("id", "created_at", "updated_at")
+
+# Posición (8 bytes) y longitud (4 bytes) de un registro en la tabla de posiciones
+INDEX_SLOT = struct.Struct(">QI")
+
+# Cola del contenedor versión 3: posición y longitud de la tabla + identificador
+INDEX_MAGIC = b"PMIX"
+INDEX_TRAILER = struct.Struct(">QI4s")
+
+# Bytes finales de cada registro que entran en el resumen (la etiqueta de
+# autenticación en los registros autenticados)
+MANIFEST_TAIL_SIZE = 16
+
+def _key_check_mac(key, label, salt):
+    """
+    Calcula el HMAC-SHA256 de comprobación de una clave
+    
+    Args:
+        key (bytes): Clave derivada
+        label (str): Nombre de la clave ("master" o "data")
+        salt (bytes): Valor aleatorio de la comprobación
+    
+    Returns:
+        bytes: Código de autenticación
+    """
+    message = b"pasmasmand-key-check:" + label.encode('utf-8') + b":" + salt
+    return hmac.new(key, message, hashlib.sha256).digest()
+
+def make_key_check(key, label):
+    """
+    Crea el bloque de comprobación de una clave
+    
+    Args:
+        key (bytes): Clave derivada
+        label (str): Nombre de la clave
+    
+    Returns:
+        dict: Sal y código de autenticación en base64
+    """
+    salt = os.urandom(16)
+    return {
+        "salt": base64.b64encode(salt).decode('ascii'),
+        "mac": base64.b64encode(_key_check_mac(key, label, salt)).decode('ascii')
+    }
+
+def verify_key_check(key, label, key_check):
+    """
+    Comprueba una clave contra su bloque de comprobación en tiempo constante
+    
+    Args:
+        key (bytes): Clave derivada
+        label (str): Nombre de la clave
+        key_check (dict): Bloque creado por make_key_check
+    
+    Returns:
+        bool: True si la clave es correcta
+    """
+    salt = base64.b64decode(key_check["salt"])
+    expected = base64.b64decode(key_check["mac"])
+    return hmac.compare_digest(_key_check_mac(key, label, salt), expected)
+
+def build_header(keys, cipher):
+    """
+    Crea la cabecera del almacén
+    
+    Args:
+        keys (dict): Clave derivada por nombre ("master" y "data"); las
+            ausentes quedan sin bloque de comprobación
+        cipher (str): Cifrado de los datos del almacén (ver crypto.records)
+    
+    Returns:
+        dict: Cabecera con el cifrado y los bloques de comprobación de las claves
+    """
+    return {
+        "cipher": cipher,
+        "key_checks": {label: make_key_check(keys[label], label) for label in KEY_LABELS if label in keys}
+    }
+
+def field_context(entry_id, field):
+    """
+    Obtiene el contexto que vincula un campo cifrado a su entrada
+    
+    Args:
+        entry_id (str): ID de la entrada
+        field (str): Nombre del campo
+    
+    Returns:
+        bytes: ID con su longitud (2 bytes) seguido del nombre del campo
+    """
+    encoded_id = entry_id.encode('utf-8')
+    return len(encoded_id).to_bytes(2, 'big') + encoded_id + field.encode('utf-8')
+
+def pack_header(header, version=FORMAT_VERSION):
+    """
+    Codifica el prefijo y la cabecera
+    
+    Args:
+        header (dict): Cabecera (se guarda en claro)
+        version (int): Versión del contenedor
+    
+    Returns:
+        bytes: Prefijo y cabecera JSON
+    """
+    header_data = json.dumps(header, separators=(",", ":")).encode('utf-8')
+    return PREFIX.pack(MAGIC, version, len(header_data)) + header_data
+
+def unpack_vault(raw):
+    """
+    Separa la cabecera del contenido cifrado
+    
+    Args:
+        raw (bytes): Contenido completo del archivo
+    
+    Returns:
+        tuple: (versión del contenedor (0 sin cabecera), cabecera o None,
+            contenido cifrado)
+    
+    Raises:
+        ValueError: Si la cabecera está dañada o su versión no se admite
+    """
+    header, header_end = parse_header(raw)
+    if header is None:
+        return 0, None, raw
+    return PREFIX.unpack_from(raw)[1], header, raw[header_end:]
+
+def new_manifest():
+    """
+    Crea el resumen de los registros de entradas de un contenedor versión 4
+    
+    El resumen se guarda con los metadatos cifrados y cubre, en orden, el ID
+    de cada entrada y la longitud y los últimos bytes de su registro, de modo
+    que al cargar se detecta un registro eliminado, movido o sustituido por
+    una versión anterior.
+    
+    Returns:
+        dict: Número de registros y estado del hash (ver add_to_manifest)
+    """
+    return {"count": 0, "hash": hashlib.sha256(b"pasmasmand-records:")}
+
+def add_to_manifest(manifest, entry_id, record):
+    """
+    Añade el registro de una entrada al resumen
+    
+    Args:
+        manifest (dict): Resumen creado por new_manifest
+        entry_id (str): ID de la entrada (el del registro descifrado al cargar)
+        record (bytes): Registro cifrado
+    """
+    encoded_id = entry_id.encode('utf-8')
+    manifest["count"] += 1
+    manifest["hash"].update(
+        TEXT_LENGTH.pack(len(encoded_id)) + encoded_id
+        + RECORD_LENGTH.pack(len(record)) + bytes(record[-MANIFEST_TAIL_SIZE:])
+    )
+
+def manifest_summary(manifest):
+    """
+    Obtiene la forma serializable de un resumen
+    
+    Args:
+        manifest (dict): Resumen creado por new_manifest
+    
+    Returns:
+        dict: Número de registros y hash en hexadecimal
+    """
+    return {"count": manifest["count"], "sha256": manifest["hash"].hexdigest()}
+
+def pack_records(records):
+    """
+    Codifica una secuencia de registros con su longitud
+    
+    Args:
+        records (list): Registros cifrados (bytes)
+    
+    Returns:
+        bytes: Registros con prefijo de longitud
+    """
+    return b"".join(RECORD_LENGTH.pack(len(record)) + record for record in records)
+
+def iter_indexed_records(records):
+    """
+    Codifica por fragmentos los registros seguidos de su tabla de posiciones (versión 3 o posterior)
+    
+    La tabla guarda, por cada registro con ID, el ID en claro (con longitud
+    de 2 bytes), la posición de sus datos respecto al inicio del contenido y
+    su longitud. La cola final indica dónde empieza la tabla, de modo que un
+    lector puede localizar cualquier registro sin recorrer los anteriores.
+    
+    Los registros se consumen y se entregan de uno en uno, así que el
+    contenido completo nunca se reúne en memoria; solo se acumula la tabla.
+    
+    Args:
+        records (iterable): Tuplas (ID o None si no se indexa, registro cifrado)
+    
+    Yields:
+        bytes: Fragmentos del contenido, en orden
+    """
+    table = []
+    offset = 0
+    for entry_id, record in records:
+        yield RECORD_LENGTH.pack(len(record))
+        yield record
+        offset += RECORD_LENGTH.size
+        if entry_id is not None:
+            encoded_id = entry_id.encode('utf-8')
+            table.append(TEXT_LENGTH.pack(len(encoded_id)) + encoded_id + INDEX_SLOT.pack(offset, len(record)))
+        offset += len(record)
+    
+    table_data = b"".join(table)
+    yield table_data
+    yield INDEX_TRAILER.pack(offset, len(table_data), INDEX_MAGIC)
+
+def read_trailer(body):
+    """
+    Lee la cola de un contenedor versión 3
+    
+    Args:
+        body (bytes): Contenido tras la cabecera (admite memoryview)
+    
+    Returns:
+        tuple: (posición de la tabla de posiciones, longitud de la tabla)
+    
+    Raises:
+        ValueError: Si la cola o la tabla están fuera del contenido
+    """
+    if len(body) < INDEX_TRAILER.size:
+        raise ValueError("Tabla de posiciones del almacén truncada")
+    table_offset, table_length, magic = INDEX_TRAILER.unpack_from(body, len(body) - INDEX_TRAILER.size)
+    if magic != INDEX_MAGIC or table_offset + table_length != len(body) - INDEX_TRAILER.size:
+        raise ValueError("Tabla de posiciones del almacén dañada")
+    return table_offset, table_length
+
+def unpack_index(table, limit):
+    """
+    Decodifica la tabla de posiciones
+    
+    Args:
+        table (bytes): Tabla creada por iter_indexed_records
+        limit (int): Final de la zona de registros (las posiciones no pueden superarlo)
+    
+    Returns:
+        list: Tuplas (ID, posición, longitud) en el orden del almacén
+    
+    Raises:
+        ValueError: Si la tabla está dañada
+    """
+    slots = []
+    offset = 0
+    try:
+        while offset < len(table):
+            (length,) = TEXT_LENGTH.unpack_from(table, offset)
+            offset += TEXT_LENGTH.size
+            entry_id = bytes(table[offset:offset + length]).decode('utf-8')
+            offset += length
+            record_offset, record_length = INDEX_SLOT.unpack_from(table, offset)
+            offset += INDEX_SLOT.size
+            if record_offset + record_length > limit:
+                raise ValueError("Tabla de posiciones del almacén dañada")
+            slots.append((entry_id, record_offset, record_length))
+    except struct.error as e:
+        raise ValueError("Tabla de posiciones del almacén truncada") from e
+    return slots
+
+def unpack_records(body):
+    """
+    Separa los registros de un contenedor versión 2 (o la zona de registros de las posteriores)
+    
+    Args:
+        body (bytes): Contenido tras la cabecera
+    
+    Returns:
+        list: Registros cifrados
+    
+    Raises:
+        ValueError: Si un registro está truncado
+    """
+    records = []
+    offset = 0
+    while offset < len(body):
+        if offset + RECORD_LENGTH.size > len(body):
+            raise ValueError("Registro del almacén truncado")
+        (length,) = RECORD_LENGTH.unpack_from(body, offset)
+        offset += RECORD_LENGTH.size
+        if offset + length > len(body):
+            raise ValueError("Registro del almacén truncado")
+        records.append(body[offset:offset + length])
+        offset += length
+    return records
+
+def encode_entry(entry, fields):
+    """
+    Codifica una entrada con sus campos cifrados en bytes
+    
+    Formato: id, created_at y updated_at como texto UTF-8 con longitud de
+    2 bytes, y cada campo cifrado con longitud de 4 bytes (0 = vacío).
+    
+    Args:
+        entry (dict): Entrada con los campos cifrados en bytes
+        fields (tuple): Campos cifrados, en orden
+    
+    Returns:
+        bytes: Entrada codificada
+    """
+    parts = []
+    for name in ENTRY_TEXTS:
+        text = entry[name].encode('utf-8')
+        parts.append(TEXT_LENGTH.pack(len(text)))
+        parts.append(text)
+    for field in fields:
+        value = entry.get(field) or b""
+        parts.append(FIELD_LENGTH.pack(len(value)))
+        parts.append(value)
+    return b"".join(parts)
+
+def decode_entry(data, fields):
+    """
+    Decodifica una entrada creada por encode_entry
+    
+    Args:
+        data (bytes): Entrada codificada
+        fields (tuple): Campos cifrados, en orden
+    
+    Returns:
+        dict: Entrada con los campos cifrados en bytes (sin los vacíos)
+    
+    Raises:
+        ValueError: Si la entrada está truncada
+    """
+    entry = {}
+    offset = 0
+    try:
+        for name in ENTRY_TEXTS:
+            (length,) = TEXT_LENGTH.unpack_from(data, offset)
+            offset += TEXT_LENGTH.size
+            entry[name] = bytes(data[offset:offset + length]).decode('utf-8')
+            offset += length
+        for field in fields:
+            (length,) = FIELD_LENGTH.unpack_from(data, offset)
+            offset += FIELD_LENGTH.size
+            if length:
+                entry[field] = bytes(data[offset:offset + length])
+            offset += length
+    except struct.error as e:
+        raise ValueError("Entrada del almacén truncada") from e
+    if offset != len(data):
+        raise ValueError("Entrada del almacén con datos sobrantes")
+    return entry
+
+def entry_to_json(entry, fields):
+    """
+    Convierte una entrada a su forma JSON (campos cifrados en base64)
+    
+    Args:
+        entry (dict): Entrada con los campos cifrados en bytes
+        fields (tuple): Campos cifrados
+    
+    Returns:
+        dict: Entrada serializable
+    """
+    return {
+        name: base64.b64encode(value).decode('ascii') if name in fields else value
+        for name, value in entry.items()
+    }
+
+def entry_from_json(entry, fields):
+    """
+    Convierte una entrada JSON (versión 1 o diario) a campos en bytes
+    
+    Args:
+        entry (dict): Entrada con los campos cifrados en base64
+        fields (tuple): Campos cifrados
+    
+    Returns:
+        dict: Entrada con los campos cifrados en bytes
+    """
+    return {
+        name: base64.b64decode(value) if name in fields else value
+        for name, value in entry.items()
+        if not (name in fields and not value)
+    }
+
+def is_complete(path):
+    """
+    Comprueba sin las claves que un archivo versión 3 o posterior está completo
+    
+    La cabecera, la cola, la tabla de posiciones y las longitudes de los
+    registros deben ser coherentes con el tamaño del archivo.
+    
+    Args:
+        path (str): Ruta del archivo
+    
+    Returns:
+        bool: True si el archivo está completo
+    """
+    try:
+        with open(path, 'rb') as f:
+            raw = f.read()
+        version, _, body = unpack_vault(raw)
+        if version < FORMAT_INDEXED:
+            return False
+        table_offset, table_length = read_trailer(body)
+        unpack_index(body[table_offset:table_offset + table_length], table_offset)
+        unpack_records(body[:table_offset])
+        return True
+    except (OSError, ValueError):
+        return False
+
+def stat_key(path):
+    """
+    Obtiene los datos de os.stat que identifican una versión del archivo
+    
+    Args:
+        path (str): Ruta del archivo
+    
+    Returns:
+        tuple: (dispositivo, inodo, tamaño, fecha de modificación en ns)
+    """
+    stat = os.stat(path)
+    return (stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+def read_header(path):
+    """
+    Lee solo la cabecera de un archivo de almacén
+    
+    Args:
+        path (str): Ruta del almacén
+    
+    Returns:
+        dict: Cabecera o None si el archivo no la tiene
+    
+    Raises:
+        ValueError: Si la cabecera está dañada o su versión no se admite
+    """
+    with open(path, 'rb') as f:
+        prefix = f.read(PREFIX.size)
+        if len(prefix) < PREFIX.size or not prefix.startswith(MAGIC):
+            return None
+        
+        _, _, header_length = PREFIX.unpack(prefix)
+        if header_length > MAX_HEADER_SIZE:
+            raise ValueError("Cabecera del almacén demasiado grande")
+        
+        header, _ = parse_header(prefix + f.read(header_length))
+        return header
+
+def parse_header(raw):
+    """
+    Interpreta el prefijo y la cabecera JSON
+    
+    Args:
+        raw (bytes): Contenido desde el inicio del archivo
+    
+    Returns:
+        tuple: (cabecera o None, posición donde empieza el contenido cifrado)
+    """
+    if len(raw) < PREFIX.size or not raw.startswith(MAGIC):
+        return None, 0
+    
+    _, version, header_length = PREFIX.unpack_from(raw)
+    if version not in (FORMAT_JSON, FORMAT_RECORDS, FORMAT_INDEXED, FORMAT_MANIFEST):
+        raise ValueError(f"Versión de almacén no soportada: {version}")
+    
+    header_end = PREFIX.size + header_length
+    if header_length > MAX_HEADER_SIZE or len(raw) < header_end:
+        raise ValueError("Cabecera del almacén dañada")
+    
+    return json.loads(raw[PREFIX.size:header_end].decode('utf-8')), header_end
\ No newline at end of file
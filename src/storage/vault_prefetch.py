@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lectura anticipada del archivo del almacen
+"""
+
+import os
+import threading
+
+from . import vault_format
+
+class VaultPrefetch:
+    """
+    Lee el almacén cifrado y su cabecera en un hilo propio
+    
+    Pensado para la ventana de inicio de sesión: la lectura del disco (lenta
+    en directorios de red) avanza mientras el usuario escribe las claves. Los
+    bytes leídos solo se entregan si el archivo no cambió desde la lectura.
+    """
+    
+    def __init__(self, path):
+        """
+        Inicia la lectura
+        
+        Args:
+            path (str): Ruta del almacén
+        """
+        self.path = path
+        self.header = None
+        self.error = None
+        self._raw = None
+        self._stat = None
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="vault-prefetch", daemon=True)
+        self._thread.start()
+    
+    def wait(self, timeout=None):
+        """
+        Espera a que termine la lectura
+        
+        Args:
+            timeout (float, opcional): Segundos máximos de espera
+        
+        Returns:
+            bool: True si la lectura terminó
+        """
+        return self._done.wait(timeout)
+    
+    def is_current(self):
+        """
+        Indica si los datos leídos corresponden al archivo actual
+        
+        Returns:
+            bool: True si hay datos y el archivo no cambió
+        """
+        self.wait()
+        if self._raw is None:
+            return False
+        try:
+            return vault_format.stat_key(self.path) == self._stat
+        except OSError:
+            return False
+    
+    def take(self):
+        """
+        Entrega el contenido leído una sola vez
+        
+        Returns:
+            bytes: Contenido del archivo o None si no se leyó o ya no es válido
+        """
+        raw = self._raw if self.is_current() else None
+        self._raw = None
+        return raw
+    
+    def _run(self):
+        """Lee el archivo y su cabecera"""
+        try:
+            if not os.path.exists(self.path):
+                return
+            
+            stat = vault_format.stat_key(self.path)
+            with open(self.path, 'rb') as f:
+                raw = f.read()
+            
+            # Descartar la lectura si el archivo cambió mientras se leía
+            if vault_format.stat_key(self.path) != stat:
+                return
+            
+            _, self.header, _ = vault_format.unpack_vault(raw)
+            self._stat = stat
+            self._raw = raw
+            print(f"DEBUG: Almacén leído por adelantado ({len(raw)} bytes)")
+        except Exception as e:
+            # La lectura anticipada es opcional: load() leerá el archivo
+            self.error = e
+            print(f"DEBUG: No se pudo leer el almacén por adelantado: {str(e)}")
+        finally:
+            self._done.set()
\ No newline at end of file
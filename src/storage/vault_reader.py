@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Acceso aleatorio a los registros del archivo del almacen
+"""
+
+import mmap
+
+from . import vault_format
+
+class VaultReader:
+    """
+    Lee registros sueltos de un almacén versión 3 o posterior proyectado en memoria
+    
+    El archivo se proyecta con mmap y solo se interpretan la cabecera y la
+    tabla de posiciones (en claro); los registros cifrados se copian cuando
+    se piden, así que consultar una entrada no lee ni descifra el resto del
+    almacén. Los registros se entregan tal como están en el archivo: el
+    descifrado corresponde al almacén, que tiene las claves.
+    """
+    
+    def __init__(self, path):
+        """
+        Proyecta el archivo y lee su tabla de posiciones
+        
+        Args:
+            path (str): Ruta del almacén
+        
+        Raises:
+            ValueError: Si el archivo no tiene tabla de posiciones o está dañada
+            OSError: Si no se puede abrir el archivo
+        """
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._stat = vault_format.stat_key(path)
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            
+            header, body_start = vault_format.parse_header(
+                self._map[:vault_format.PREFIX.size + vault_format.MAX_HEADER_SIZE]
+            )
+            if header is None or vault_format.PREFIX.unpack_from(self._map)[1] < vault_format.FORMAT_INDEXED:
+                raise ValueError("El almacén no tiene tabla de posiciones")
+            
+            body = memoryview(self._map)[body_start:]
+            try:
+                table_offset, table_length = vault_format.read_trailer(body)
+                slots = vault_format.unpack_index(body[table_offset:table_offset + table_length], table_offset)
+            finally:
+                body.release()
+        except Exception:
+            self.close()
+            raise
+        
+        self.header = header
+        self.ids = [entry_id for entry_id, _, _ in slots]
+        self._slots = {
+            entry_id: (body_start + offset, length) for entry_id, offset, length in slots
+        }
+    
+    def __len__(self):
+        """Número de entradas del almacén"""
+        return len(self.ids)
+    
+    def is_current(self):
+        """
+        Indica si la proyección corresponde al archivo actual
+        
+        Returns:
+            bool: True si el archivo no cambió desde que se abrió
+        """
+        try:
+            return self._map is not None and vault_format.stat_key(self.path) == self._stat
+        except OSError:
+            return False
+    
+    def record(self, entry_id):
+        """
+        Obtiene el registro cifrado de una entrada
+        
+        Args:
+            entry_id (str): ID de la entrada
+        
+        Returns:
+            bytes: Registro cifrado o None si la entrada no existe
+        """
+        slot = self._slots.get(entry_id)
+        if slot is None:
+            return None
+        offset, length = slot
+        return self._map[offset:offset + length]
+    
+    def records(self, start, stop):
+        """
+        Obtiene los registros cifrados de un tramo de entradas
+        
+        Args:
+            start (int): Posición de la primera entrada
+            stop (int): Posición siguiente a la última entrada
+        
+        Returns:
+            list: Tuplas (ID, registro cifrado) en el orden del almacén
+        """
+        return [(entry_id, self.record(entry_id)) for entry_id in self.ids[start:stop]]
+    
+    def close(self):
+        """Libera la proyección y cierra el archivo"""
+        if getattr(self, "_map", None) is not None:
+            self._map.close()
+        self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
\ No newline at end of file
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Guardado del almacen en segundo plano
+"""
+
+import queue
+import threading
+
+class VaultSaver:
+    """
+    Persiste en un hilo propio los cambios diferidos del almacén
+    
+    Activa la escritura diferida del almacén: las modificaciones se aplican
+    en memoria y vuelven de inmediato, y este hilo las guarda tras una breve
+    espera, de modo que una ráfaga de cambios se escribe una sola vez. El
+    resultado de cada escritura se entrega como ("saved", número de cambios)
+    o ("error", excepción), que la interfaz recoge desde el hilo de Tk con
+    poll(). Si una escritura falla, los cambios siguen pendientes y se
+    reintentan con el siguiente cambio o al detener el hilo.
+    """
+    
+    def __init__(self, vault, delay_ms=500):
+        """
+        Activa la escritura diferida e inicia el hilo
+        
+        Args:
+            vault: Instancia de PasswordVault
+            delay_ms (int): Espera tras un cambio antes de guardar
+        """
+        self.vault = vault
+        self.delay = delay_ms / 1000
+        self._messages = queue.Queue()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        
+        self.vault.defer_writes(self._wakeup.set)
+        self._thread = threading.Thread(target=self._run, name="vault-saver", daemon=True)
+        self._thread.start()
+    
+    def poll(self):
+        """
+        Obtiene los resultados de las escrituras sin bloquear
+        
+        Returns:
+            list: Tuplas (tipo, valor)
+        """
+        messages = []
+        while True:
+            try:
+                messages.append(self._messages.get_nowait())
+            except queue.Empty:
+                return messages
+    
+    def stop(self):
+        """
+        Detiene el hilo, guarda los cambios pendientes y vuelve a la escritura inmediata
+        
+        Raises:
+            ValueError: Si no se pudieron guardar los cambios (siguen pendientes)
+        """
+        self._stopping.set()
+        self._wakeup.set()
+        self._thread.join()
+        
+        self.vault.write_pending()
+        self.vault.defer_writes(None)
+    
+    def _run(self):
+        """Bucle principal del hilo"""
+        while not self._stopping.is_set():
+            self._wakeup.wait()
+            
+            # Esperar a que termine la ráfaga de cambios
+            self._stopping.wait(self.delay)
+            self._wakeup.clear()
+            
+            try:
+                saved = self.vault.write_pending()
+                if saved:
+                    self._messages.put(("saved", saved))
+            except Exception as e:
+                self._messages.put(("error", e))
\ No newline at end of file
@@ -13,6 +13,7 @@ import traceback
 
 from ..core.auth_manager import AuthManager
 from ..storage.vault import PasswordVault
+from ..storage.vault_prefetch import VaultPrefetch
 from .main_window import MainWindow
 
 class LoginWindow:
@@ -35,6 +36,9 @@ class LoginWindow:
         
         # Configurar ventana
         self.setup_ui()
+        
+        # Leer el almacén mientras se escriben las claves
+        self.prefetch = VaultPrefetch(self.config.get_vault_path())
     
     def setup_ui(self):
         """Configura los elementos de la interfaz"""
@@ -134,6 +138,7 @@ class LoginWindow:
         
         # Comprobar si existe el almacén
         vault = PasswordVault(self.auth_manager, self.config)
+        vault.prefetch = self.prefetch
         vault_exists = vault.exists()
         
         # DEBUG: Comprobar si existe el almacén
@@ -173,7 +178,7 @@ class LoginWindow:
                     "Éxito", 
                     "Se ha creado un nuevo almacén de contraseñas."
                 )
-                self.open_main_window()
+                self.open_main_window(vault)
             except Exception as e:
                 # DEBUG: Error detallado
                 print(f"DEBUG ERROR (crear): {str(e)}")
@@ -196,7 +201,7 @@ class LoginWindow:
                 if test_result:
                     # Autenticación exitosa
                     self.failed_attempts = 0
-                    self.open_main_window()
+                    self.open_main_window(vault)
                 else:
                     # Autenticación fallida
                     self.failed_attempts += 1
@@ -222,8 +227,14 @@ class LoginWindow:
                     f"Error al acceder al almacén: {str(e)}"
                 )
     
-    def open_main_window(self):
-        """Abre la ventana principal después de autenticar"""
+    def open_main_window(self, vault=None):
+        """
+        Abre la ventana principal después de autenticar
+        
+        Args:
+            vault (PasswordVault, opcional): Almacén ya abierto (conserva la
+                lectura anticipada y los datos cargados al comprobar las claves)
+        """
         # Ocultar la ventana de login
         self.root.withdraw()
         
@@ -234,11 +245,15 @@ class LoginWindow:
         # Aplicar el mismo tema
         style = ttk.Style()
         
-        # Configurar para que cuando se cierre la ventana principal, se cierre todo
-        main_window.protocol("WM_DELETE_WINDOW", self.root.destroy)
-        
         # Iniciar la aplicación principal
-        app = MainWindow(main_window, self.auth_manager, self.config)
+        app = MainWindow(main_window, self.auth_manager, self.config, vault)
+        
+        # Configurar para que cuando se cierre la ventana principal se guarden
+        # los cambios pendientes y se cierre todo
+        def close_application():
+            if app.close_session():
+                self.root.destroy()
+        main_window.protocol("WM_DELETE_WINDOW", close_application)
         
         # Centrar ventana
         window_width = 900
@@ -6,6 +6,7 @@ Ventana principal del Gestor de Contrasenas
 
 import os
 import time
+from datetime import datetime
 import tkinter as tk
 from tkinter import messagebox, StringVar, BooleanVar
 import ttkbootstrap as ttk
@@ -14,13 +15,18 @@ from ttkbootstrap.dialogs import Messagebox
 
 from .password_generator_dialog import PasswordGeneratorDialog
 from .password_entry_dialog import PasswordEntryDialog
+from .search_worker import SearchWorker
+from .tree_sync import sync_treeview
+from .vault_loader import VaultLoader
+from .virtual_list import VirtualTreeview
 from ..core.password_manager import PasswordManager
 from ..storage.vault import PasswordVault
+from ..storage.vault_saver import VaultSaver
 
 class MainWindow:
     """Ventana principal de la aplicacion"""
     
-    def __init__(self, root, auth_manager, config):
+    def __init__(self, root, auth_manager, config, vault=None):
         """
         Inicializa la ventana principal
         
@@ -28,13 +34,14 @@ class MainWindow:
             root: Ventana raíz de Tkinter
             auth_manager: Instancia de AuthManager
             config: Instancia de Config
+            vault (PasswordVault, opcional): Almacén abierto al iniciar sesión
         """
         self.root = root
         self.auth_manager = auth_manager
         self.config = config
         
         # Crear gestor de contraseñas
-        self.vault = PasswordVault(auth_manager, config)
+        self.vault = vault or PasswordVault(auth_manager, config)
         self.password_manager = PasswordManager(self.vault)
         
         # Variables para la interfaz
@@ -42,9 +49,36 @@ class MainWindow:
         self.status_var = StringVar(value="Listo")
         self.selected_id = None
         self.password_list = []
+        self.entries_by_id = {}  # Entradas del listado por ID (descifrado diferido)
+        self.load_overrides = {}  # Entradas cambiadas durante la carga en segundo plano
+        self.displayed_rows = {}  # Valores mostrados en la tabla por ID
+        self.visible_entries = []  # Entradas mostradas, en orden
+        self.sort_key_cache = {}  # Columna -> {ID: (updated_at, clave)}
+        
+        # A partir de este número de filas solo se materializa el área visible
+        self.virtual_list_threshold = self.config.get("virtual_list_threshold", 2000)
         self.sort_by = "service"  # Ordenar por servicio por defecto
         self.sort_ascending = True
         
+        # Búsqueda en segundo plano con espera entre pulsaciones
+        self.search_worker = SearchWorker(self.password_manager.search_passwords)
+        self.search_debounce_ms = self.config.get("search_debounce_ms", 150)
+        self.search_generation = 0
+        self._awaited_generation = None
+        self._search_after_id = None
+        self._search_poll_id = None
+        
+        # Carga en segundo plano
+        self.vault_loader = None
+        self.load_total = 0
+        self._load_poll_id = None
+        
+        # Guardado en segundo plano (las modificaciones no esperan a la escritura)
+        self.vault_saver = None
+        self._save_poll_id = None
+        if self.config.get("write_behind", True):
+            self.vault_saver = VaultSaver(self.vault, self.config.get("write_behind_delay_ms", 500))
+        
         # Variable para control de inactividad
         self.auto_logout_time = self.config.get("auto_logout_minutes", 5) * 60 * 1000  # Convertir a milisegundos
         self.last_activity_time = time.time() * 1000
@@ -52,8 +86,12 @@ class MainWindow:
         # Configurar ventana
         self.setup_ui()
         
-        # Cargar contraseñas
-        self.load_passwords()
+        # Cargar contraseñas en segundo plano (la ventana se usa mientras tanto)
+        self.start_background_load()
+        
+        # Mostrar el resultado de los guardados en segundo plano
+        if self.vault_saver is not None:
+            self._save_poll_id = self.root.after(250, self.poll_saver)
         
         # Iniciar temporizador de inactividad
         self.check_inactivity()
@@ -161,6 +199,9 @@ class MainWindow:
         self.password_tree.pack(side=LEFT, fill=BOTH, expand=YES)
         vscroll.pack(side=RIGHT, fill=Y)
         
+        # Vista virtualizada para listas grandes (inactiva hasta superar el umbral)
+        self.virtual_list = VirtualTreeview(self.password_tree, vscroll, self.make_row)
+        
         # Asociar evento de selección
         self.password_tree.bind("<<TreeviewSelect>>", self.on_password_select)
         self.password_tree.bind("<Double-1>", self.view_password)
@@ -177,6 +218,14 @@ class MainWindow:
         self.count_var = StringVar(value="0 contraseñas")
         count_label = ttk.Label(status_frame, textvariable=self.count_var, anchor=E)
         count_label.pack(side=RIGHT, padx=5)
+        
+        # Progreso de la carga inicial (visible solo mientras carga)
+        self.load_progress = ttk.Progressbar(
+            status_frame,
+            mode="determinate",
+            length=150,
+            bootstyle="info"
+        )
     
     def create_menu(self):
         """Crea la barra de menú"""
@@ -190,7 +239,7 @@ class MainWindow:
         file_menu.add_command(label="Generar contraseña", command=self.open_generator)
         file_menu.add_separator()
         file_menu.add_command(label="Cerrar sesión", command=self.logout)
-        file_menu.add_command(label="Salir", command=self.root.destroy)
+        file_menu.add_command(label="Salir", command=self.logout)
         
         # Menú Editar
         edit_menu = tk.Menu(menubar, tearoff=0)
@@ -206,15 +255,113 @@ class MainWindow:
         menubar.add_cascade(label="Ayuda", menu=help_menu)
         help_menu.add_command(label="Acerca de", command=self.show_about)
     
+    def start_background_load(self):
+        """Inicia la carga del almacén en un hilo y muestra las entradas por lotes"""
+        self.cancel_background_load()
+        
+        # Descartar búsquedas en curso
+        self.search_generation += 1
+        
+        self.password_list = []
+        self.entries_by_id = {}
+        self.load_overrides = {}
+        self.load_total = 0
+        self.status_var.set("Cargando contraseñas...")
+        self.load_progress.configure(value=0, maximum=1)
+        self.load_progress.pack(side=RIGHT, padx=5)
+        
+        self.vault_loader = VaultLoader(self.password_manager, self.config.get("load_batch_size", 500))
+        self._load_poll_id = self.root.after(50, self.poll_background_load)
+    
+    def poll_background_load(self):
+        """Incorpora en el hilo de Tk los lotes descifrados por el hilo de carga"""
+        self._load_poll_id = None
+        loader = self.vault_loader
+        if loader is None or loader.cancelled:
+            return
+        
+        received = False
+        finished = False
+        for kind, value in loader.poll():
+            if kind == "total":
+                self.load_total = value
+                self.load_progress.configure(maximum=max(1, value))
+            elif kind == "batch":
+                # Los lotes se descifran sobre las entradas anteriores a los
+                # cambios hechos durante la carga: no deben sobrescribirlos
+                value = [entry for entry in value if entry["id"] not in self.load_overrides]
+                self.password_list.extend(value)
+                self.entries_by_id.update((entry["id"], entry) for entry in value)
+                received = True
+            elif kind == "done":
+                finished = True
+            elif kind == "error":
+                self.finish_background_load()
+                messagebox.showerror("Error", f"No se pudieron cargar las contraseñas: {str(value)}")
+                self.status_var.set("Error al cargar contraseñas")
+                return
+        
+        if received:
+            # La lista ya ordenada más un lote nuevo se ordena en tiempo casi lineal
+            self.sort_password_list()
+            if not self.search_var.get().strip():
+                self.display_entries(self.password_list)
+            self.count_var.set(f"{len(self.password_list)} contraseñas")
+            self.load_progress.configure(value=len(self.password_list))
+            self.status_var.set(f"Cargando contraseñas... {len(self.password_list)}/{self.load_total}")
+        
+        if finished:
+            self.finish_background_load()
+            self.status_var.set("Contraseñas cargadas correctamente")
+        else:
+            self._load_poll_id = self.root.after(50, self.poll_background_load)
+    
+    def finish_background_load(self):
+        """Oculta el progreso y libera el hilo de carga"""
+        self.vault_loader = None
+        self.load_overrides = {}
+        self.load_progress.pack_forget()
+    
+    def cancel_background_load(self):
+        """Cancela la carga en segundo plano, si hay una en curso"""
+        if self._load_poll_id is not None:
+            self.root.after_cancel(self._load_poll_id)
+            self._load_poll_id = None
+        if self.vault_loader is not None:
+            self.vault_loader.cancel()
+            self.finish_background_load()
+    
+    def poll_saver(self):
+        """Muestra en la barra de estado el resultado del guardado en segundo plano"""
+        for kind, value in self.vault_saver.poll():
+            if kind == "saved":
+                self.status_var.set("Cambios guardados")
+            elif kind == "error":
+                self.status_var.set(f"Error al guardar los cambios: {str(value)}")
+        
+        self._save_poll_id = self.root.after(250, self.poll_saver)
+    
     def load_passwords(self):
         """Carga las contraseñas del almacenamiento"""
+        # Descartar búsquedas en curso
+        self.search_generation += 1
+        
+        # Durante la carga en segundo plano la lista se sigue completando:
+        # mostrar lo cargado en vez de descifrar todo en el hilo de Tk
+        if self.vault_loader is not None:
+            self.display_entries(self.password_list)
+            self.count_var.set(f"{len(self.password_list)} contraseñas")
+            return
+        
         try:
-            # Limpiar vista
-            for item in self.password_tree.get_children():
-                self.password_tree.delete(item)
-            
-            # Obtener contraseñas
+            # Obtener contraseñas (la contraseña se descifra solo al usarla)
             self.password_list = self.password_manager.get_all_passwords()
+            self.entries_by_id = {entry["id"]: entry for entry in self.password_list}
+            
+            # Olvidar claves de ordenamiento de entradas eliminadas
+            for keys in self.sort_key_cache.values():
+                for entry_id in [entry_id for entry_id in keys if entry_id not in self.entries_by_id]:
+                    del keys[entry_id]
             
             # Ordenar según criterio actual
             self.sort_password_list()
@@ -222,15 +369,8 @@ class MainWindow:
             # Actualizar contador
             self.count_var.set(f"{len(self.password_list)} contraseñas")
             
-            # Mostrar en la tabla
-            for entry in self.password_list:
-                values = (
-                    entry.get("service", ""),
-                    entry.get("username", ""),
-                    entry.get("comment", ""),
-                    entry.get("created_at", "").split("T")[0]  # Solo mostrar fecha
-                )
-                self.password_tree.insert("", END, iid=entry["id"], values=values)
+            # Mostrar en la tabla aplicando solo las diferencias
+            self.display_entries(self.password_list)
             
             self.status_var.set("Contraseñas cargadas correctamente")
             
@@ -238,40 +378,187 @@ class MainWindow:
             messagebox.showerror("Error", f"No se pudieron cargar las contraseñas: {str(e)}")
             self.status_var.set("Error al cargar contraseñas")
     
-    def sort_password_list(self):
-        """Ordena la lista de contraseñas según el criterio actual"""
-        # Función para obtener clave de ordenamiento
-        def get_sort_key(entry):
-            value = entry.get(self.sort_by, "")
-            # Para fechas, asegurar formato ISO
-            if self.sort_by in ["created_at", "updated_at"] and isinstance(value, str):
-                return value
-            # Para otros campos, convertir a minúsculas para ordenamiento no sensible a mayúsculas
-            return str(value).lower()
-        
-        # Ordenar la lista
-        self.password_list.sort(
-            key=get_sort_key,
+    def apply_entry_change(self, entry_id):
+        """
+        Refleja en el listado el cambio de una entrada sin recargar el almacén
+        
+        Solo se obtiene la entrada añadida o modificada (ninguna si se
+        eliminó). Durante la carga en segundo plano la entrada queda registrada
+        para que los lotes pendientes no la sobrescriban.
+        
+        Args:
+            entry_id (str): ID de la entrada añadida, modificada o eliminada
+        """
+        try:
+            entry = self.password_manager.get_list_entry(entry_id)
+        except Exception as e:
+            messagebox.showerror("Error", f"No se pudieron cargar las contraseñas: {str(e)}")
+            return
+        
+        if self.vault_loader is not None:
+            self.load_overrides[entry_id] = entry
+        
+        # Sustituir la entrada en la lista (solo se compara el ID, sin descifrar)
+        for position, listed in enumerate(self.password_list):
+            if listed["id"] == entry_id:
+                del self.password_list[position]
+                break
+        self.entries_by_id.pop(entry_id, None)
+        
+        if entry is not None:
+            self.password_list.append(entry)
+            self.entries_by_id[entry_id] = entry
+        else:
+            # Olvidar las claves de ordenamiento de la entrada eliminada
+            for keys in self.sort_key_cache.values():
+                keys.pop(entry_id, None)
+        
+        # La lista ya ordenada más una entrada se ordena en tiempo casi lineal
+        self.sort_password_list()
+        
+        if self.search_var.get().strip():
+            self.start_search()
+        else:
+            self.search_generation += 1
+            self.display_entries(self.password_list)
+            self.count_var.set(f"{len(self.password_list)} contraseñas")
+    
+    def display_entries(self, entries):
+        """
+        Muestra las entradas en la tabla en el orden dado
+        
+        Compara con las filas actuales (por ID) y solo inserta, elimina, mueve
+        o actualiza las filas que cambian.
+        
+        Con más filas que virtual_list_threshold solo se materializa el área
+        visible (ver VirtualTreeview).
+        
+        Args:
+            entries (list): Entradas a mostrar
+        """
+        self.visible_entries = entries
+        
+        if len(entries) >= self.virtual_list_threshold:
+            self.virtual_list.activate(self.displayed_rows)
+            if self.virtual_list.selected_id is None:
+                self.virtual_list.selected_id = self.selected_id
+            self.virtual_list.set_entries(entries)
+            return
+        
+        self.virtual_list.deactivate()
+        rows = [self.make_row(entry) for entry in entries]
+        sync_treeview(self.password_tree, rows, self.displayed_rows)
+    
+    def make_row(self, entry):
+        """
+        Construye la fila de la tabla para una entrada
+        
+        Args:
+            entry: Entrada de la lista
+            
+        Returns:
+            tuple: (iid, valores)
+        """
+        return (entry["id"], (
+            entry.get("service", ""),
+            entry.get("username", ""),
+            entry.get("comment", ""),
+            entry.get("created_at", "").split("T")[0]  # Solo mostrar fecha
+        ))
+    
+    def get_sort_key(self, entry, column):
+        """
+        Obtiene la clave de ordenamiento de una entrada, calculada una sola vez
+        
+        La clave se guarda por ID y se recalcula solo si la entrada cambió
+        (distinto updated_at).
+        
+        Args:
+            entry: Entrada de la lista
+            column (str): Columna de ordenamiento
+            
+        Returns:
+            Clave comparable (fecha para columnas de fecha, texto normalizado para el resto)
+        """
+        keys = self.sort_key_cache.setdefault(column, {})
+        stamp = entry.get("updated_at")
+        cached = keys.get(entry["id"])
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        
+        value = entry.get(column, "")
+        if column in ["created_at", "updated_at"]:
+            # Para fechas, comparar el instante y no el texto
+            try:
+                key = datetime.fromisoformat(value)
+            except (TypeError, ValueError):
+                key = datetime.min
+        else:
+            # Para otros campos, ordenamiento no sensible a mayúsculas
+            key = str(value).casefold()
+        
+        keys[entry["id"]] = (stamp, key)
+        return key
+    
+    def sort_entries(self, entries):
+        """
+        Ordena una lista de entradas en el lugar según el criterio actual
+        
+        Args:
+            entries (list): Entradas a ordenar
+        """
+        column = self.sort_by
+        entries.sort(
+            key=lambda entry: self.get_sort_key(entry, column),
             reverse=not self.sort_ascending
         )
     
+    def sort_password_list(self):
+        """Ordena la lista de contraseñas según el criterio actual"""
+        self.sort_entries(self.password_list)
+    
     def sort_treeview(self, column):
         """Ordena la tabla por columna"""
         if self.sort_by == column:
             # Si ya estaba ordenado por esta columna, invertir dirección
             self.sort_ascending = not self.sort_ascending
+            self.password_list.reverse()
+            if self.visible_entries is not self.password_list:
+                self.visible_entries.reverse()
         else:
             # Nueva columna, ordenar ascendente
             self.sort_by = column
             self.sort_ascending = True
+            self.sort_password_list()
+            if self.visible_entries is not self.password_list:
+                self.sort_entries(self.visible_entries)
         
-        # Recargar para aplicar ordenamiento
-        self.load_passwords()
+        # Reordenar las filas existentes sin recargar el almacén
+        self.display_entries(self.visible_entries)
+    
+    def get_selected_entry(self):
+        """
+        Obtiene la entrada seleccionada
+        
+        Reutiliza la entrada del listado, cuyos campos diferidos (contraseña)
+        se obtienen de la cache de entradas del almacén al leerlos; si no
+        está, la obtiene del almacén.
+        
+        Returns:
+            Entrada de la contraseña seleccionada
+        """
+        entry = self.entries_by_id.get(self.selected_id)
+        if entry is None:
+            entry = self.password_manager.get_password(self.selected_id)
+        return entry
     
     def on_password_select(self, event):
         """Maneja el evento de selección en la tabla"""
         selected_items = self.password_tree.selection()
-        if selected_items:
+        if self.virtual_list.active:
+            # La fila seleccionada puede no estar materializada
+            self.selected_id = self.virtual_list.track_selection(selected_items)
+        elif selected_items:
             self.selected_id = selected_items[0]
         else:
             self.selected_id = None
@@ -281,9 +568,9 @@ class MainWindow:
         dialog = PasswordEntryDialog(self.root, None, self)
         self.root.wait_window(dialog.dialog)
         
-        # Si se guardó correctamente, recargar
+        # Si se guardó correctamente, mostrar la nueva entrada
         if dialog.result:
-            self.load_passwords()
+            self.apply_entry_change(dialog.saved_id)
     
     def edit_password(self):
         """Edita la contraseña seleccionada"""
@@ -293,15 +580,15 @@ class MainWindow:
         
         try:
             # Obtener datos de la contraseña seleccionada
-            entry = self.password_manager.get_password(self.selected_id)
+            entry = self.get_selected_entry()
             
             # Abrir diálogo de edición
             dialog = PasswordEntryDialog(self.root, entry, self)
             self.root.wait_window(dialog.dialog)
             
-            # Si se guardó correctamente, recargar
+            # Si se guardó correctamente, actualizar su fila
             if dialog.result:
-                self.load_passwords()
+                self.apply_entry_change(dialog.saved_id)
                 
         except Exception as e:
             messagebox.showerror("Error", f"No se pudo editar la contraseña: {str(e)}")
@@ -314,7 +601,7 @@ class MainWindow:
         
         try:
             # Obtener datos de la contraseña seleccionada
-            entry = self.password_manager.get_password(self.selected_id)
+            entry = self.get_selected_entry()
             
             # Mostrar diálogo de visualización (mismo que edición pero en modo solo lectura)
             dialog = PasswordEntryDialog(self.root, entry, self, readonly=True)
@@ -342,8 +629,8 @@ class MainWindow:
             # Eliminar contraseña
             self.password_manager.delete_password(self.selected_id)
             
-            # Recargar lista
-            self.load_passwords()
+            # Quitar la entrada de la lista
+            self.apply_entry_change(self.selected_id)
             
             self.status_var.set("Contraseña eliminada correctamente")
             
@@ -358,7 +645,7 @@ class MainWindow:
         
         try:
             # Obtener datos de la contraseña seleccionada
-            entry = self.password_manager.get_password(self.selected_id)
+            entry = self.get_selected_entry()
             
             # Copiar al portapapeles
             value = entry.get(field, "")
@@ -382,7 +669,14 @@ class MainWindow:
             pass
     
     def search_passwords(self, event=None):
-        """Busca contraseñas que coinciden con el criterio"""
+        """Programa la búsqueda tras una pausa en la escritura"""
+        if self._search_after_id is not None:
+            self.root.after_cancel(self._search_after_id)
+        self._search_after_id = self.root.after(self.search_debounce_ms, self.start_search)
+    
+    def start_search(self):
+        """Lanza la búsqueda actual en el hilo de trabajo"""
+        self._search_after_id = None
         query = self.search_var.get().strip()
         
         if not query:
@@ -390,23 +684,40 @@ class MainWindow:
             self.load_passwords()
             return
         
-        try:
-            # Buscar contraseñas
-            results = self.password_manager.search_passwords(query)
-            
-            # Limpiar vista
-            for item in self.password_tree.get_children():
-                self.password_tree.delete(item)
+        # Una nueva generación deja obsoletas las búsquedas anteriores
+        self.search_generation += 1
+        self._awaited_generation = self.search_generation
+        self.search_worker.submit(self.search_generation, query)
+        self.status_var.set("Buscando...")
+        
+        if self._search_poll_id is None:
+            self._search_poll_id = self.root.after(30, self.poll_search_results)
+    
+    def poll_search_results(self):
+        """Recoge en el hilo de Tk los resultados del hilo de búsqueda"""
+        self._search_poll_id = None
+        
+        for generation, results, error in self.search_worker.poll():
+            if generation != self._awaited_generation or generation != self.search_generation:
+                # Resultado de una búsqueda superada
+                continue
             
-            # Mostrar resultados
-            for entry in results:
-                values = (
-                    entry.get("service", ""),
-                    entry.get("username", ""),
-                    entry.get("comment", ""),
-                    entry.get("created_at", "").split("T")[0]  # Solo mostrar fecha
-                )
-                self.password_tree.insert("", END, iid=entry["id"], values=values)
+            self._awaited_generation = None
+            if error is not None:
+                messagebox.showerror("Error", f"Error en la búsqueda: {str(error)}")
+            else:
+                self.show_search_results(results)
+        
+        # Seguir esperando mientras la búsqueda actual no haya terminado
+        if self._awaited_generation is not None and self._awaited_generation == self.search_generation:
+            self._search_poll_id = self.root.after(30, self.poll_search_results)
+    
+    def show_search_results(self, results):
+        """Muestra en la tabla los resultados de una búsqueda"""
+        try:
+            # Mostrar resultados ordenados aplicando solo las diferencias
+            self.sort_entries(results)
+            self.display_entries(results)
             
             # Actualizar contador
             self.count_var.set(f"{len(results)} contraseñas encontradas")
@@ -418,6 +729,9 @@ class MainWindow:
     
     def clear_search(self):
         """Limpia la búsqueda y muestra todas las contraseñas"""
+        if self._search_after_id is not None:
+            self.root.after_cancel(self._search_after_id)
+            self._search_after_id = None
         self.search_var.set("")
         self.load_passwords()
     
@@ -446,13 +760,85 @@ class MainWindow:
         
         messagebox.showinfo("Acerca de", about_text)
     
-    def logout(self):
-        """Cierra la sesión actual"""
+    def close_session(self):
+        """
+        Detiene los hilos, guarda los cambios pendientes y descarta las claves
+        
+        Si los cambios diferidos no se pueden guardar se ofrece reintentar; si
+        el usuario no lo hace, la sesión sigue abierta (con sus claves y los
+        cambios pendientes) para no perderlos.
+        
+        Returns:
+            bool: True si la sesión se cerró, False si se canceló el cierre
+        """
+        # Guardar los cambios diferidos antes de detener nada
+        if not self.flush_pending_changes():
+            return False
+        
+        # Detener la carga y la búsqueda en segundo plano
+        self.cancel_background_load()
+        for after_id in (self._search_after_id, self._search_poll_id, self._save_poll_id):
+            if after_id is not None:
+                self.root.after_cancel(after_id)
+        self._save_poll_id = None
+        self.search_worker.stop()
+        
+        # Compactar el diario antes de descartar las claves (los cambios ya
+        # están guardados, así que un error aquí no impide cerrar)
+        try:
+            self.vault.close()
+        except Exception as e:
+            print(f"DEBUG: Error al cerrar el almacén: {str(e)}")
+            messagebox.showerror("Error", f"No se pudo cerrar el almacén: {str(e)}")
+        
         # Limpiar datos en memoria
         self.auth_manager.clear_keys()
+        return True
+    
+    def flush_pending_changes(self):
+        """
+        Detiene el guardado en segundo plano y escribe los cambios pendientes
+        
+        Returns:
+            bool: True si se guardaron, False si falló la escritura y el
+                usuario no quiso reintentar (el guardado en segundo plano
+                vuelve a quedar activo)
+        """
+        if self.vault_saver is None:
+            return True
+        
+        while True:
+            try:
+                self.vault_saver.stop()
+                self.vault_saver = None
+                return True
+            except Exception as e:
+                print(f"DEBUG: Error al guardar los cambios pendientes: {str(e)}")
+                if not messagebox.askretrycancel(
+                    "Error",
+                    f"No se pudieron guardar los cambios: {str(e)}\n\n"
+                    "Si cancela, la sesión sigue abierta para no perderlos."
+                ):
+                    break
+        
+        # Seguir guardando en segundo plano los cambios pendientes
+        self.vault_saver = VaultSaver(self.vault, self.config.get("write_behind_delay_ms", 500))
+        self.status_var.set("Hay cambios sin guardar")
+        return False
+    
+    def logout(self):
+        """
+        Cierra la sesión actual
+        
+        Returns:
+            bool: True si la sesión se cerró
+        """
+        if not self.close_session():
+            return False
         
         # Cerrar ventana principal
         self.root.destroy()
+        return True
     
     def reset_inactivity_timer(self, event=None):
         """Reinicia el temporizador de inactividad"""
@@ -469,8 +855,9 @@ class MainWindow:
                 "Cierre automático",
                 "Se ha cerrado la sesión automáticamente por inactividad."
             )
-            self.logout()
-            return
+            if self.logout():
+                return
+            self.reset_inactivity_timer()
         
         # Programar próxima verificación (cada 10 segundos)
         self.root.after(10000, self.check_inactivity)
\ No newline at end of file
@@ -30,6 +30,7 @@ class PasswordEntryDialog:
         self.main_window = main_window
         self.readonly = readonly
         self.result = None
+        self.saved_id = None  # ID de la entrada guardada
         
         # Variables para los campos
         self.username_var = StringVar()
@@ -371,10 +372,12 @@ class PasswordEntryDialog:
             # Si es una entrada existente, actualizar
             if self.entry:
                 self.main_window.password_manager.update_password(self.entry["id"], entry_data)
+                self.saved_id = self.entry["id"]
                 self.main_window.status_var.set(f"Contraseña para {service} actualizada")
             else:
                 # Si es nueva, agregar
                 new_id = self.main_window.password_manager.add_password(entry_data)
+                self.saved_id = new_id
                 self.main_window.status_var.set(f"Nueva contraseña para {service} creada")
             
             # Indicar éxito
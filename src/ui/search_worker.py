@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Hilo de trabajo para busquedas en segundo plano
+"""
+
+import queue
+import threading
+
+class SearchWorker:
+    """
+    Ejecuta búsquedas en un hilo propio
+    
+    Cada solicitud lleva un número de generación creciente. Las solicitudes
+    pendientes superadas por otra más reciente se descartan sin ejecutarse, y
+    la interfaz ignora los resultados cuya generación ya no es la actual.
+    Los resultados se recogen desde el hilo de Tk con poll().
+    """
+    
+    def __init__(self, search_func):
+        """
+        Inicializa el hilo de búsqueda
+        
+        Args:
+            search_func (callable): Función (consulta) -> lista de resultados
+        """
+        self._search_func = search_func
+        self._requests = queue.Queue()
+        self._results = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="search-worker", daemon=True)
+        self._thread.start()
+    
+    def submit(self, generation, query):
+        """
+        Encola una búsqueda
+        
+        Args:
+            generation (int): Generación de la solicitud
+            query (str): Texto a buscar
+        """
+        self._requests.put((generation, query))
+    
+    def poll(self):
+        """
+        Obtiene los resultados terminados sin bloquear
+        
+        Returns:
+            list: Tuplas (generación, resultados, error)
+        """
+        finished = []
+        while True:
+            try:
+                finished.append(self._results.get_nowait())
+            except queue.Empty:
+                return finished
+    
+    def stop(self):
+        """Detiene el hilo tras la búsqueda en curso"""
+        self._requests.put(None)
+    
+    def _run(self):
+        """Bucle principal del hilo"""
+        while True:
+            request = self._requests.get()
+            
+            # Quedarse solo con la solicitud más reciente
+            while request is not None:
+                try:
+                    request = self._requests.get_nowait()
+                except queue.Empty:
+                    break
+            
+            if request is None:
+                return
+            
+            generation, query = request
+            try:
+                self._results.put((generation, self._search_func(query), None))
+            except Exception as e:
+                self._results.put((generation, None, e))
\ No newline at end of file
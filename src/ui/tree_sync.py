@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sincronizacion incremental de filas de un Treeview
+"""
+
+from bisect import bisect_left
+
+def longest_increasing_subsequence(sequence):
+    """
+    Calcula las posiciones de una subsecuencia creciente más larga
+    
+    Args:
+        sequence (list): Secuencia de números distintos
+    
+    Returns:
+        set: Posiciones de la secuencia que forman la subsecuencia
+    """
+    tails = []        # Último valor de cada longitud
+    tail_indexes = []  # Posición de ese valor
+    previous = [None] * len(sequence)
+    
+    for i, value in enumerate(sequence):
+        length = bisect_left(tails, value)
+        if length == len(tails):
+            tails.append(value)
+            tail_indexes.append(i)
+        else:
+            tails[length] = value
+            tail_indexes[length] = i
+        previous[i] = tail_indexes[length - 1] if length > 0 else None
+    
+    positions = set()
+    i = tail_indexes[-1] if tail_indexes else None
+    while i is not None:
+        positions.add(i)
+        i = previous[i]
+    return positions
+
+def sync_treeview(tree, rows, displayed):
+    """
+    Actualiza un Treeview plano para que muestre exactamente las filas dadas
+    
+    Aplica solo las operaciones necesarias: elimina las filas que sobran,
+    inserta las nuevas, cambia los valores modificados y mueve el mínimo de
+    filas (las que no forman parte de la subsecuencia creciente más larga del
+    orden actual respecto al nuevo).
+    
+    Args:
+        tree: Treeview a actualizar (filas de primer nivel, iid = ID de entrada)
+        rows (list): Tuplas (iid, valores) en el orden deseado
+        displayed (dict): Valores mostrados actualmente por iid; se actualiza
+    
+    Returns:
+        dict: Número de operaciones aplicadas por tipo
+    """
+    new_positions = {iid: i for i, (iid, _) in enumerate(rows)}
+    
+    # Eliminar filas que ya no existen
+    removed = [iid for iid in displayed if iid not in new_positions]
+    if removed:
+        tree.delete(*removed)
+        for iid in removed:
+            del displayed[iid]
+    
+    # Filas que conservan su orden relativo (no es necesario moverlas)
+    current = [iid for iid in tree.get_children() if iid in new_positions]
+    stable_positions = longest_increasing_subsequence([new_positions[iid] for iid in current])
+    stable = {current[i] for i in stable_positions}
+    
+    # Desenganchar las que se moverán para que los índices de Tk coincidan
+    moving = [iid for iid in current if iid not in stable]
+    if moving:
+        tree.detach(*moving)
+    
+    inserted = changed = 0
+    for index, (iid, values) in enumerate(rows):
+        if iid not in displayed:
+            tree.insert("", index, iid=iid, values=values)
+            inserted += 1
+        else:
+            if iid not in stable:
+                tree.move(iid, "", index)
+            if displayed[iid] != values:
+                tree.item(iid, values=values)
+                changed += 1
+        displayed[iid] = values
+    
+    return {
+        "deleted": len(removed),
+        "inserted": inserted,
+        "moved": len(moving),
+        "changed": changed
+    }
\ No newline at end of file
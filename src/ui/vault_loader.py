@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Carga del almacen en segundo plano por lotes
+"""
+
+import queue
+import threading
+
+class VaultLoader:
+    """
+    Descifra las entradas en un hilo propio y las entrega por lotes
+    
+    El hilo produce mensajes ("total", n), ("batch", lote), ("done", None) o
+    ("error", excepción) que la interfaz recoge desde el hilo de Tk con poll().
+    """
+    
+    def __init__(self, password_manager, batch_size=500):
+        """
+        Inicia la carga
+        
+        Args:
+            password_manager: Instancia de PasswordManager
+            batch_size (int): Entradas por lote
+        """
+        self.password_manager = password_manager
+        self.batch_size = batch_size
+        self._messages = queue.Queue()
+        self._cancelled = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="vault-loader", daemon=True)
+        self._thread.start()
+    
+    def cancel(self):
+        """Detiene la carga tras el lote en curso"""
+        self._cancelled.set()
+    
+    @property
+    def cancelled(self):
+        """Indica si la carga fue cancelada"""
+        return self._cancelled.is_set()
+    
+    def poll(self):
+        """
+        Obtiene los mensajes producidos sin bloquear
+        
+        Returns:
+            list: Tuplas (tipo, valor)
+        """
+        messages = []
+        while True:
+            try:
+                messages.append(self._messages.get_nowait())
+            except queue.Empty:
+                return messages
+    
+    def _run(self):
+        """Bucle principal del hilo"""
+        try:
+            self._messages.put(("total", self.password_manager.count_passwords()))
+            
+            for batch in self.password_manager.iter_password_batches(self.batch_size):
+                if self._cancelled.is_set():
+                    return
+                self._messages.put(("batch", batch))
+            
+            self._messages.put(("done", None))
+        except Exception as e:
+            self._messages.put(("error", e))
\ No newline at end of file
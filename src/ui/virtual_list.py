@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lista virtualizada sobre un Treeview para almacenes muy grandes
+"""
+
+from .tree_sync import sync_treeview
+
+class VirtualTreeview:
+    """
+    Muestra en un Treeview solo las filas visibles de una lista de entradas
+    
+    En modo activo el Treeview contiene únicamente las filas del área visible
+    más un pequeño margen (overscan). La barra de desplazamiento, la rueda del
+    ratón y las flechas del teclado mueven un desplazamiento sobre la lista en
+    memoria y las filas se actualizan con sync_treeview, de modo que el coste
+    de pintar no depende del tamaño del almacén.
+    """
+    
+    def __init__(self, tree, scrollbar, make_row, overscan=10):
+        """
+        Inicializa la lista virtual (inactiva)
+        
+        Args:
+            tree: Treeview donde se muestran las filas
+            scrollbar: Barra de desplazamiento vertical asociada
+            make_row (callable): Función (entrada) -> (iid, valores)
+            overscan (int): Filas adicionales que se materializan bajo el área visible
+        """
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.make_row = make_row
+        self.overscan = overscan
+        
+        self.active = False
+        self.entries = []
+        self.positions = {}  # ID -> índice en entries
+        self.offset = 0  # Índice de la primera fila visible
+        self.selected_id = None
+        self.displayed = {}
+        
+        # Eventos (solo actúan en modo activo)
+        self.tree.bind("<Configure>", self._on_configure, add="+")
+        self.tree.bind("<MouseWheel>", self._on_mousewheel, add="+")
+        self.tree.bind("<Button-4>", self._on_mousewheel, add="+")
+        self.tree.bind("<Button-5>", self._on_mousewheel, add="+")
+        for key in ("<Up>", "<Down>", "<Prior>", "<Next>", "<Home>", "<End>"):
+            self.tree.bind(key, self._on_key, add="+")
+    
+    def activate(self, displayed):
+        """
+        Toma el control del desplazamiento del Treeview
+        
+        Args:
+            displayed (dict): Valores mostrados por iid (compartido con la vista normal)
+        """
+        self.displayed = displayed
+        if self.active:
+            return
+        
+        self.active = True
+        self.tree.configure(yscrollcommand="")
+        self.scrollbar.configure(command=self.yview)
+    
+    def deactivate(self):
+        """Devuelve el desplazamiento al Treeview"""
+        if not self.active:
+            return
+        
+        self.active = False
+        self.entries = []
+        self.positions = {}
+        self.offset = 0
+        self.tree.configure(yscrollcommand=self.scrollbar.set)
+        self.scrollbar.configure(command=self.tree.yview)
+    
+    def set_entries(self, entries):
+        """
+        Establece la lista completa de entradas y pinta el área visible
+        
+        Args:
+            entries (list): Entradas en el orden de presentación
+        """
+        self.entries = entries
+        self.positions = {entry["id"]: i for i, entry in enumerate(entries)}
+        if self.selected_id not in self.positions:
+            self.selected_id = None
+        self.offset = self._clamp(self.offset)
+        self.render()
+    
+    def track_selection(self, selected_items):
+        """
+        Actualiza la selección a partir de la selección del Treeview
+        
+        Una fila seleccionada que sale del área visible deja de existir en el
+        Treeview, pero sigue seleccionada en la lista virtual.
+        
+        Args:
+            selected_items (tuple): Selección actual del Treeview
+        
+        Returns:
+            str: ID seleccionado o None
+        """
+        if selected_items:
+            self.selected_id = selected_items[0]
+        elif self.selected_id in self.displayed:
+            # Deselección explícita de una fila visible
+            self.selected_id = None
+        return self.selected_id
+    
+    def visible_rows(self):
+        """
+        Calcula cuántas filas caben en el área visible
+        
+        Returns:
+            int: Número de filas visibles
+        """
+        row_height = self._row_height()
+        height = self.tree.winfo_height() - row_height  # Descontar encabezado
+        return max(1, height // row_height)
+    
+    def render(self):
+        """Materializa las filas del área visible"""
+        if not self.active:
+            return
+        
+        count = self.visible_rows()
+        window = self.entries[self.offset:self.offset + count + self.overscan]
+        sync_treeview(self.tree, [self.make_row(entry) for entry in window], self.displayed)
+        self.tree.yview_moveto(0)
+        
+        # Restaurar la selección si la fila vuelve a estar visible
+        if self.selected_id in self.displayed and self.tree.selection() != (self.selected_id,):
+            self.tree.selection_set(self.selected_id)
+            self.tree.focus(self.selected_id)
+        
+        total = len(self.entries)
+        if total:
+            self.scrollbar.set(self.offset / total, min(1.0, (self.offset + count) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+    
+    def yview(self, *args):
+        """
+        Responde a la barra de desplazamiento (mismo protocolo que Treeview.yview)
+        
+        Args:
+            *args: ("moveto", fracción) o ("scroll", n, "units" | "pages")
+        """
+        if not self.active or not args:
+            return
+        
+        if args[0] == "moveto":
+            offset = int(float(args[1]) * len(self.entries))
+        elif args[0] == "scroll":
+            step = int(args[1])
+            if len(args) > 2 and args[2] == "pages":
+                step *= self.visible_rows()
+            offset = self.offset + step
+        else:
+            return
+        
+        self.scroll_to_offset(offset)
+    
+    def scroll_to_offset(self, offset):
+        """
+        Desplaza la vista para que la fila indicada sea la primera visible
+        
+        Args:
+            offset (int): Índice de la primera fila visible
+        """
+        offset = self._clamp(offset)
+        if offset != self.offset:
+            self.offset = offset
+            self.render()
+    
+    def see(self, index):
+        """
+        Desplaza la vista lo mínimo para que una fila sea visible
+        
+        Args:
+            index (int): Índice de la entrada
+        """
+        count = self.visible_rows()
+        if index < self.offset:
+            self.scroll_to_offset(index)
+        elif index >= self.offset + count:
+            self.scroll_to_offset(index - count + 1)
+    
+    def _clamp(self, offset):
+        """Limita el desplazamiento al rango válido"""
+        max_offset = max(0, len(self.entries) - self.visible_rows())
+        return max(0, min(offset, max_offset))
+    
+    def _row_height(self):
+        """Obtiene la altura de fila del estilo del Treeview"""
+        try:
+            style = self.tree.cget("style") or "Treeview"
+            row_height = int(self.tree.tk.call("ttk::style", "lookup", style, "-rowheight") or 0)
+        except Exception:
+            row_height = 0
+        return row_height if row_height > 0 else 20
+    
+    def _on_configure(self, event):
+        """Vuelve a pintar al cambiar el tamaño"""
+        if self.active:
+            self.offset = self._clamp(self.offset)
+            self.render()
+    
+    def _on_mousewheel(self, event):
+        """Desplaza con la rueda del ratón"""
+        if not self.active:
+            return None
+        
+        if event.num == 4:
+            step = -3
+        elif event.num == 5:
+            step = 3
+        else:
+            step = -3 if event.delta > 0 else 3
+        
+        self.scroll_to_offset(self.offset + step)
+        return "break"
+    
+    def _on_key(self, event):
+        """Mueve la selección con el teclado más allá del área visible"""
+        if not self.active or not self.entries:
+            return None
+        
+        index = self.positions.get(self.selected_id, self.offset)
+        page = self.visible_rows()
+        moves = {
+            "Up": index - 1,
+            "Down": index + 1,
+            "Prior": index - page,
+            "Next": index + page,
+            "Home": 0,
+            "End": len(self.entries) - 1
+        }
+        if event.keysym not in moves:
+            return None
+        
+        index = max(0, min(moves[event.keysym], len(self.entries) - 1))
+        self.selected_id = self.entries[index]["id"]
+        self.see(index)
+        self.render()
+        return "break"
\ No newline at end of file
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Escritura atomica de archivos
+"""
+
+import os
+import stat
+
+# Sufijo del archivo temporal junto al archivo de destino
+TEMP_SUFFIX = ".tmp"
+
+def temp_path(path):
+    """
+    Obtiene la ruta del archivo temporal de un archivo
+    
+    Args:
+        path (str): Ruta del archivo de destino
+    
+    Returns:
+        str: Ruta del temporal (en el mismo directorio, para que el renombrado sea atómico)
+    """
+    return path + TEMP_SUFFIX
+
+def fsync_directory(directory):
+    """
+    Sincroniza con el disco la entrada de un directorio (tras crear o renombrar archivos)
+    
+    En Windows no se pueden abrir directorios; allí el renombrado ya es
+    persistente al volver de os.replace.
+    
+    Args:
+        directory (str): Ruta del directorio
+    """
+    if os.name == "nt":
+        return
+    fd = os.open(directory or ".", os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def write_atomic(path, chunks):
+    """
+    Escribe un archivo completo o no lo modifica
+    
+    Los datos se escriben en un temporal del mismo directorio, se sincronizan
+    con el disco y el temporal sustituye al archivo con os.replace. Tras una
+    interrupción queda el archivo anterior intacto (y quizá el temporal). Los
+    lectores que ya tenían abierto el archivo anterior siguen viéndolo.
+    
+    Args:
+        path (str): Ruta del archivo de destino
+        chunks (iterable): Fragmentos (bytes) a escribir, en orden
+    """
+    temporary = temp_path(path)
+    try:
+        with open(temporary, 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        
+        # Conservar los permisos del archivo anterior
+        if os.path.exists(path):
+            os.chmod(temporary, stat.S_IMODE(os.stat(path).st_mode))
+        
+        os.replace(temporary, path)
+    except BaseException:
+        try:
+            os.remove(temporary)
+        except OSError:
+            pass
+        raise
+    
+    fsync_directory(os.path.dirname(os.path.abspath(path)))
\ No newline at end of file
@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Utilidades de concurrencia
+"""
+
+import functools
+
+def synchronized(method):
+    """
+    Ejecuta un metodo de instancia con el bloqueo self.lock adquirido
+    
+    Args:
+        method: Metodo a proteger
+    
+    Returns:
+        function: Metodo envuelto
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock:
+            return method(self, *args, **kwargs)
+    return wrapper
\ No newline at end of file
@@ -16,7 +16,19 @@ DEFAULT_CONFIG = {
     "recent_services": [],
     "last_access": None,
     "max_login_attempts": 5,
-    "min_password_length": 8
+    "min_password_length": 8,
+    "journal_mode": True,  # Registrar cambios en un diario en vez de reescribir el almacen
+    "journal_compact_threshold": 500,  # Registros en el diario antes de compactar
+    "entry_cache_size": 256,  # Entradas descifradas que se mantienen en memoria
+    "search_index_sidecar": True,  # Guardar el índice de búsqueda cifrado junto al almacén
+    "search_debounce_ms": 150,  # Espera tras la última tecla antes de buscar
+    "virtual_list_threshold": 2000,  # Filas a partir de las que la tabla se virtualiza
+    "load_batch_size": 500,  # Entradas por lote en la carga en segundo plano
+    "parallel_decrypt_threshold": 20000,  # Entradas a partir de las que se descifra en varios procesos (0 lo desactiva)
+    "parallel_decrypt_workers": 0,  # Procesos para el descifrado en paralelo (0 = núcleos disponibles)
+    "vault_cipher": "aes-256-ctr-hmac-sha256",  # Cifrado de los almacenes nuevos o migrados ("aes-256-cbc" = formato anterior)
+    "write_behind": True,  # Guardar los cambios en segundo plano (la interfaz no espera a la escritura)
+    "write_behind_delay_ms": 500  # Espera tras un cambio antes de guardar (agrupa las ráfagas)
 }
 
 class Config:
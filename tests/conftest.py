@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Utilidades comunes de las pruebas
+"""
+
+import pytest
+
+from src.core.auth_manager import AuthManager
+from src.storage.vault import PasswordVault
+
+class FakeConfig:
+    """Configuración mínima que usa PasswordVault"""
+    
+    def __init__(self, vault_path, **options):
+        self.vault_path = vault_path
+        self.options = options
+    
+    def get(self, key, default=None):
+        return self.options.get(key, default)
+    
+    def get_vault_path(self):
+        return self.vault_path
+
+@pytest.fixture
+def vault_path(tmp_path):
+    """Ruta de un almacén en un directorio temporal"""
+    return str(tmp_path / "test.vault")
+
+@pytest.fixture
+def open_vault(vault_path):
+    """
+    Crea instancias de PasswordVault sobre el mismo archivo
+    
+    Cada llamada usa un AuthManager nuevo con las mismas claves, como una
+    sesión distinta de la aplicación.
+    """
+    def factory(**options):
+        auth_manager = AuthManager()
+        auth_manager.set_keys("clave maestra", "clave de datos")
+        return PasswordVault(auth_manager, FakeConfig(vault_path, **options))
+    return factory
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas del cifrado CBC por lotes
+"""
+
+import os
+
+from Crypto.Cipher import AES
+from Crypto.Util.Padding import pad, unpad
+
+from src.crypto.encryption import encrypt_cbc_many, decrypt_cbc_many, BATCH_MAX_BLOCKS
+
+KEY = bytes(range(32))
+
+# Mensajes de longitudes variadas, incluidos los que se cifran por separado
+MESSAGES = [
+    b"",
+    b"a",
+    os.urandom(15),
+    os.urandom(16),
+    os.urandom(17),
+    os.urandom(16 * BATCH_MAX_BLOCKS),
+    os.urandom(16 * BATCH_MAX_BLOCKS + 5),
+]
+
+def cbc_encrypt(data):
+    """Cifra un mensaje con CBC directamente (iv + datos cifrados)"""
+    iv = os.urandom(16)
+    return iv + AES.new(KEY, AES.MODE_CBC, iv).encrypt(pad(data, AES.block_size))
+
+def cbc_decrypt(encrypted):
+    """Descifra un mensaje con CBC directamente"""
+    return unpad(AES.new(KEY, AES.MODE_CBC, encrypted[:16]).decrypt(encrypted[16:]), AES.block_size)
+
+def test_round_trip():
+    encrypted = encrypt_cbc_many(KEY, MESSAGES)
+    assert decrypt_cbc_many(KEY, encrypted) == MESSAGES
+
+def test_empty_batch():
+    assert encrypt_cbc_many(KEY, []) == []
+    assert decrypt_cbc_many(KEY, []) == []
+
+def test_prepared_ecb_gives_the_same_result():
+    ecb = AES.new(KEY, AES.MODE_ECB)
+    encrypted = encrypt_cbc_many(KEY, MESSAGES, ecb)
+    assert decrypt_cbc_many(KEY, encrypted, ecb) == MESSAGES
+
+def test_batch_matches_plain_cbc():
+    # Los lotes producen y aceptan exactamente el formato de CBC mensaje a mensaje
+    encrypted = encrypt_cbc_many(KEY, MESSAGES)
+    assert [len(item) for item in encrypted] == [16 + len(pad(data, AES.block_size)) for data in MESSAGES]
+    assert [cbc_decrypt(item) for item in encrypted] == MESSAGES
+    assert decrypt_cbc_many(KEY, [cbc_encrypt(data) for data in MESSAGES]) == MESSAGES
+
+def test_ivs_are_random():
+    first, second = encrypt_cbc_many(KEY, [b"secreto", b"secreto"])
+    assert first[:16] != second[:16]
+    assert first != second
+
+def test_invalid_items_do_not_affect_the_rest():
+    encrypted = encrypt_cbc_many(KEY, [b"uno", b"dos", b"tres"])
+    items = [
+        encrypted[0],
+        encrypted[1][:16],  # solo el IV
+        encrypted[1][:-1],  # tamaño no múltiplo del bloque
+        b"",
+        encrypted[2],
+    ]
+    assert decrypt_cbc_many(KEY, items) == [b"uno", None, None, None, b"tres"]
+
+def test_wrong_key_gives_none_or_garbage():
+    encrypted = encrypt_cbc_many(KEY, [b"mensaje secreto"] * 20)
+    results = decrypt_cbc_many(os.urandom(32), encrypted)
+    assert len(results) == 20
+    assert b"mensaje secreto" not in results
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas del formato de registro autenticado
+"""
+
+import os
+
+from src.crypto.records import RecordKeys, RECORD_OVERHEAD, RECORD_VERSION, TAG_SIZE
+
+KEY = bytes(range(32))
+
+def test_round_trip():
+    keys = RecordKeys(KEY)
+    items = [b"", b"a", os.urandom(100), os.urandom(16 * 5000)]
+    records = keys.seal_many(items)
+    
+    assert [len(record) for record in records] == [len(item) + RECORD_OVERHEAD for item in items]
+    assert all(record[0] == RECORD_VERSION for record in records)
+    assert keys.open_many(records) == items
+    assert RecordKeys(KEY).open_many(records) == items
+
+def test_records_use_distinct_nonces():
+    keys = RecordKeys(KEY)
+    first, second = keys.seal_many([b"secreto", b"secreto"])
+    assert first != second
+
+def test_context_round_trip():
+    keys = RecordKeys(KEY)
+    contexts = [b"entrada-1/password", b"entrada-2/password"]
+    records = keys.seal_many([b"uno", b"dos"], contexts)
+    
+    assert keys.open_many(records, contexts) == [b"uno", b"dos"]
+    assert all(keys.verify(record, context) for record, context in zip(records, contexts))
+
+def test_swapped_context_is_rejected():
+    keys = RecordKeys(KEY)
+    contexts = [b"entrada-1/password", b"entrada-2/password"]
+    records = keys.seal_many([b"uno", b"dos"], contexts)
+    
+    # Registros intercambiados entre entradas, o abiertos sin contexto
+    assert keys.open_many(records, contexts[::-1]) == [None, None]
+    assert keys.open_many(records) == [None, None]
+    assert not keys.verify(records[0], contexts[1])
+
+def test_context_length_is_authenticated():
+    keys = RecordKeys(KEY)
+    record = keys.seal_many([b"dato"], [b"ab"])[0]
+    assert keys.open_many([record], [b"a"]) == [None]
+    assert keys.open_many([record], [b"ab\x00"]) == [None]
+
+def test_tampered_records_are_rejected():
+    keys = RecordKeys(KEY)
+    record = keys.seal_many([b"mensaje secreto"])[0]
+    
+    for position in (0, 1, RECORD_OVERHEAD - TAG_SIZE, len(record) - 1):
+        tampered = bytearray(record)
+        tampered[position] ^= 1
+        assert keys.open_many([bytes(tampered)]) == [None]
+    
+    assert keys.open_many([record[:-1], record[:RECORD_OVERHEAD - 1], b""]) == [None, None, None]
+
+def test_wrong_key_is_rejected():
+    record = RecordKeys(KEY).seal_many([b"mensaje"])[0]
+    assert RecordKeys(os.urandom(32)).open_many([record]) == [None]
+
+def test_open_many_keeps_valid_records():
+    keys = RecordKeys(KEY)
+    records = keys.seal_many([b"uno", b"dos", b"tres"])
+    records[1] = records[1][:-1] + bytes([records[1][-1] ^ 1])
+    assert keys.open_many(records) == [b"uno", None, b"tres"]
+
+def test_clear_overwrites_subkeys():
+    keys = RecordKeys(KEY)
+    enc_key, mac_key = keys.enc_key, keys.mac_key
+    keys.clear()
+    assert enc_key == bytes(32) and mac_key == bytes(32)
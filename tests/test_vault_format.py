@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas del formato binario del almacén
+"""
+
+import itertools
+
+import pytest
+
+from src.storage import vault_format
+
+FIELDS = ("username", "service", "password", "comment")
+
+ENTRY = {
+    "id": "3f0c6f0e-entrada",
+    "created_at": "2024-01-01T00:00:00",
+    "updated_at": "2024-01-02T00:00:00",
+    "username": b"\x01\x02usuario",
+    "service": b"servicio \xc3\xb1",
+    "password": bytes(range(256)),
+}
+
+def build_vault(records, header=None, version=vault_format.FORMAT_VERSION):
+    """Codifica un almacén completo con los registros (ID, registro) dados"""
+    return b"".join(itertools.chain(
+        [vault_format.pack_header(header or {"cipher": "prueba"}, version)],
+        vault_format.iter_indexed_records(records)
+    ))
+
+def test_entry_round_trip():
+    encoded = vault_format.encode_entry(ENTRY, FIELDS)
+    assert vault_format.decode_entry(encoded, FIELDS) == ENTRY
+
+def test_entry_json_round_trip():
+    as_json = vault_format.entry_to_json(ENTRY, FIELDS)
+    assert all(isinstance(value, str) for value in as_json.values())
+    assert vault_format.entry_from_json(as_json, FIELDS) == ENTRY
+
+def test_truncated_or_padded_entry_is_rejected():
+    encoded = vault_format.encode_entry(ENTRY, FIELDS)
+    with pytest.raises(ValueError):
+        vault_format.decode_entry(encoded[:-1], FIELDS)
+    with pytest.raises(ValueError):
+        vault_format.decode_entry(encoded + b"\x00", FIELDS)
+
+def test_field_context_separates_id_and_field():
+    contexts = {
+        vault_format.field_context("ab", "cpassword"),
+        vault_format.field_context("abc", "password"),
+        vault_format.field_context("abc", "username"),
+    }
+    assert len(contexts) == 3
+
+def test_header_round_trip():
+    header = {"cipher": "prueba", "key_checks": {}}
+    raw = vault_format.pack_header(header) + b"contenido"
+    assert vault_format.unpack_vault(raw) == (vault_format.FORMAT_VERSION, header, b"contenido")
+
+def test_file_without_header():
+    assert vault_format.unpack_vault(b"datos cifrados") == (0, None, b"datos cifrados")
+
+def test_unknown_version_is_rejected():
+    with pytest.raises(ValueError):
+        vault_format.unpack_vault(vault_format.pack_header({}, 99))
+
+def test_indexed_records_round_trip():
+    records = [("a", b"registro a"), ("b", b""), ("c", b"registro c" * 100), (None, b"metadatos")]
+    _, _, body = vault_format.unpack_vault(build_vault(records))
+    
+    table_offset, table_length = vault_format.read_trailer(body)
+    assert vault_format.unpack_records(body[:table_offset]) == [record for _, record in records]
+    
+    slots = vault_format.unpack_index(body[table_offset:table_offset + table_length], table_offset)
+    assert [entry_id for entry_id, _, _ in slots] == ["a", "b", "c"]
+    assert [body[offset:offset + length] for _, offset, length in slots] == [record for _, record in records[:3]]
+
+def test_is_complete(tmp_path):
+    raw = build_vault([("a", b"registro a"), (None, b"metadatos")])
+    path = tmp_path / "almacen.tmp"
+    
+    path.write_bytes(raw)
+    assert vault_format.is_complete(str(path))
+    
+    for size in (len(raw) - 1, len(raw) // 2, vault_format.PREFIX.size, 0):
+        path.write_bytes(raw[:size])
+        assert not vault_format.is_complete(str(path))
+    
+    # Los contenedores sin tabla de posiciones no se dan por completos
+    path.write_bytes(vault_format.pack_header({}, vault_format.FORMAT_RECORDS))
+    assert not vault_format.is_complete(str(path))
+    assert not vault_format.is_complete(str(tmp_path / "no_existe"))
+
+def test_truncated_records_are_rejected():
+    packed = vault_format.pack_records([b"uno", b"dos"])
+    assert vault_format.unpack_records(packed) == [b"uno", b"dos"]
+    for size in (len(packed) - 1, 2):
+        with pytest.raises(ValueError):
+            vault_format.unpack_records(packed[:size])
+
+def test_manifest_depends_on_ids_order_and_records():
+    def summary(records):
+        manifest = vault_format.new_manifest()
+        for entry_id, record in records:
+            vault_format.add_to_manifest(manifest, entry_id, record)
+        return vault_format.manifest_summary(manifest)
+    
+    records = [("a", b"x" * 40), ("b", b"y" * 40), ("c", b"z" * 40)]
+    reference = summary(records)
+    
+    assert reference == summary(list(records))
+    assert reference["count"] == 3
+    assert summary(records[:2]) != reference
+    assert summary([records[1], records[0], records[2]]) != reference
+    assert summary([("a", b"x" * 39 + b"w")] + records[1:]) != reference
+    assert summary([("a", b"x" * 41)] + records[1:]) != reference
+    assert summary([("d", b"x" * 40)] + records[1:]) != reference
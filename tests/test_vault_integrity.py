@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas de la integridad del almacén, del diario y de los guardados interrumpidos
+"""
+
+import itertools
+import json
+import os
+
+import pytest
+
+from src.crypto.records import CIPHER_CBC
+from src.storage import vault_format
+from src.storage.vault import ENTRY_FIELDS
+from src.utils.atomic_file import temp_path
+
+ERROR_TEXT = "[Error: No se pudo descifrar]"
+
+def add_entries(vault, count):
+    """Añade entradas de prueba y devuelve sus IDs"""
+    return [
+        vault.add_password({"service": f"servicio{i}", "username": f"usuario{i}", "password": f"clave{i}"})
+        for i in range(count)
+    ]
+
+def read_records(path):
+    """Obtiene la cabecera y los registros cifrados de un almacén versión 4"""
+    with open(path, 'rb') as f:
+        version, header, body = vault_format.unpack_vault(f.read())
+    assert version == vault_format.FORMAT_MANIFEST
+    return header, vault_format.unpack_records(body[:vault_format.read_trailer(body)[0]])
+
+def write_records(path, header, records):
+    """Escribe un almacén versión 4 con los registros dados (metadatos al final)"""
+    indexed = [(f"r{i}", record) for i, record in enumerate(records[:-1])] + [(None, records[-1])]
+    with open(path, 'wb') as f:
+        f.write(b"".join(itertools.chain(
+            [vault_format.pack_header(header)],
+            vault_format.iter_indexed_records(indexed)
+        )))
+
+def rewrite_entries(path, auth_manager, transform):
+    """
+    Reescribe las entradas del archivo con la clave maestra
+    
+    El resumen de los metadatos se recalcula, de modo que solo los campos
+    transformados pueden delatar el cambio.
+    """
+    header, records = read_records(path)
+    plain = auth_manager.decrypt_many_with_master_key(records)
+    entries = transform([vault_format.decode_entry(record, ENTRY_FIELDS) for record in plain[:-1]])
+    
+    sealed = auth_manager.encrypt_many_with_master_key(
+        [vault_format.encode_entry(entry, ENTRY_FIELDS) for entry in entries]
+    )
+    manifest = vault_format.new_manifest()
+    for entry, record in zip(entries, sealed):
+        vault_format.add_to_manifest(manifest, entry["id"], record)
+    metadata = dict(json.loads(plain[-1]), records=vault_format.manifest_summary(manifest))
+    sealed.append(auth_manager.encrypt_with_master_key(json.dumps(metadata).encode('utf-8')))
+    write_records(path, header, sealed)
+
+def test_round_trip(open_vault):
+    vault = open_vault(journal_mode=False)
+    vault.initialize_vault()
+    ids = add_entries(vault, 3)
+    vault.update_password(ids[1], {"service": "nuevo", "username": "u", "password": "otra"})
+    vault.delete_password(ids[2])
+    
+    reopened = open_vault()
+    assert reopened.get_password(ids[0])["password"] == "clave0"
+    assert reopened.get_password(ids[1])["service"] == "nuevo"
+    assert reopened.verify_records() == []
+    with pytest.raises(ValueError):
+        reopened.get_password(ids[2])
+
+def test_field_moved_to_another_entry_is_detected(open_vault, vault_path):
+    vault = open_vault(journal_mode=False)
+    vault.initialize_vault()
+    ids = add_entries(vault, 3)
+    
+    def swap_passwords(entries):
+        entries[0]["password"], entries[1]["password"] = entries[1]["password"], entries[0]["password"]
+        return entries
+    rewrite_entries(vault_path, vault.auth_manager, swap_passwords)
+    
+    reopened = open_vault()
+    assert sorted(reopened.verify_records()) == sorted([(ids[0], "password"), (ids[1], "password")])
+    assert reopened.get_password(ids[0])["password"] == ERROR_TEXT
+    assert reopened.get_password(ids[2])["password"] == "clave2"
+
+def test_field_moved_to_another_field_is_detected(open_vault, vault_path):
+    vault = open_vault(journal_mode=False)
+    vault.initialize_vault()
+    entry_id = add_entries(vault, 1)[0]
+    
+    def swap_fields(entries):
+        entries[0]["password"], entries[0]["username"] = entries[0]["username"], entries[0]["password"]
+        return entries
+    rewrite_entries(vault_path, vault.auth_manager, swap_fields)
+    
+    assert sorted(open_vault().verify_records()) == [(entry_id, "password"), (entry_id, "username")]
+
+@pytest.mark.parametrize("change", ["drop", "reorder", "duplicate"])
+def test_record_set_changes_are_detected(open_vault, vault_path, change):
+    vault = open_vault(journal_mode=False)
+    vault.initialize_vault()
+    add_entries(vault, 4)
+    header, records = read_records(vault_path)
+    entries, metadata = records[:-1], records[-1]
+    
+    if change == "drop":
+        entries = entries[1:]
+    elif change == "reorder":
+        entries = [entries[1], entries[0]] + entries[2:]
+    else:
+        entries = entries + entries[:1]
+    write_records(vault_path, header, entries + [metadata])
+    
+    with pytest.raises(ValueError, match="metadatos"):
+        open_vault().load()
+
+def test_rolled_back_record_is_detected(open_vault, vault_path):
+    vault = open_vault(journal_mode=False)
+    vault.initialize_vault()
+    ids = add_entries(vault, 3)
+    _, old_records = read_records(vault_path)
+    vault.update_password(ids[1], {"service": "servicio1", "username": "usuario1", "password": "cambiada"})
+    header, records = read_records(vault_path)
+    
+    records[1] = old_records[1]
+    write_records(vault_path, header, records)
+    
+    with pytest.raises(ValueError, match="metadatos"):
+        open_vault().load()
+
+def test_journal_replay(open_vault):
+    vault = open_vault()
+    vault.initialize_vault()
+    ids = add_entries(vault, 3)
+    vault.update_password(ids[0], {"service": "s", "username": "u", "password": "nueva"})
+    vault.delete_password(ids[1])
+    assert os.path.getsize(vault.journal_path) > 0
+    
+    reopened = open_vault()
+    passwords = {entry["id"]: entry["password"] for entry in reopened.get_all_passwords()}
+    assert passwords == {ids[0]: "nueva", ids[2]: "clave2"}
+    assert reopened.journal_records == 5
+
+@pytest.mark.parametrize("tail", [
+    b"\x00\x00",  # cabecera incompleta
+    vault_format.RECORD_LENGTH.pack(200) + bytes(20),  # registro incompleto
+    bytes(64),  # relleno de ceros tras un corte de corriente
+    b"\x00\x00\x00\x40" + b"\x00" * 7 + b"\x01" + bytes(range(64)),  # registro con basura
+], ids=["cabecera", "incompleto", "ceros", "basura"])
+def test_torn_journal_tail_is_cut(open_vault, tail):
+    vault = open_vault()
+    vault.initialize_vault()
+    first = add_entries(vault, 2)
+    valid_size = os.path.getsize(vault.journal_path)
+    with open(vault.journal_path, 'ab') as f:
+        f.write(tail)
+    
+    reopened = open_vault()
+    reopened.load()
+    assert os.path.getsize(vault.journal_path) == valid_size
+    
+    # Los cambios siguientes no quedan detrás del registro descartado
+    second = reopened.add_password({"service": "s", "username": "u", "password": "p"})
+    assert {entry["id"] for entry in open_vault().get_all_passwords()} == set(first + [second])
+
+def test_damaged_journal_record_before_valid_ones_is_an_error(open_vault):
+    vault = open_vault()
+    vault.initialize_vault()
+    add_entries(vault, 1)
+    with open(vault.journal_path, 'r+b') as f:
+        f.seek(20)
+        byte = f.read(1)
+        f.seek(20)
+        f.write(bytes([byte[0] ^ 1]))
+    add_entries(vault, 1)
+    
+    with pytest.raises(ValueError, match="diario"):
+        open_vault().load()
+
+def test_journal_left_by_interrupted_save_is_skipped(open_vault):
+    vault = open_vault()
+    vault.initialize_vault()
+    add_entries(vault, 2)
+    with open(vault.journal_path, 'rb') as f:
+        journal = f.read()
+    
+    # Guardado completo interrumpido antes de eliminar el diario
+    vault.compact()
+    with open(vault.journal_path, 'wb') as f:
+        f.write(journal)
+    
+    reopened = open_vault()
+    assert len(reopened.get_all_passwords()) == 2
+    reopened.add_password({"service": "s", "username": "u", "password": "p"})
+    assert len(open_vault().get_all_passwords()) == 3
+
+def test_journal_left_by_cipher_migration_is_skipped(open_vault):
+    vault = open_vault(vault_cipher=CIPHER_CBC)
+    vault.initialize_vault()
+    entry_id = add_entries(vault, 1)[0]
+    vault.update_password(entry_id, {"service": "s", "username": "u", "password": "cambiada"})
+    with open(vault.journal_path, 'rb') as f:
+        journal = f.read()
+    
+    # La migración al cifrado autenticado se interrumpe antes de eliminar el
+    # diario, cuyos registros están cifrados con el formato anterior
+    open_vault().load()
+    with open(vault.journal_path, 'wb') as f:
+        f.write(journal)
+    
+    reopened = open_vault()
+    assert [entry["password"] for entry in reopened.get_all_passwords()] == ["cambiada"]
+    assert reopened.verify_records() == []
+
+def test_complete_temp_file_replaces_the_vault(open_vault, vault_path):
+    vault = open_vault(journal_mode=False)
+    vault.initialize_vault()
+    first = add_entries(vault, 1)
+    with open(vault_path, 'rb') as f:
+        old = f.read()
+    second = add_entries(vault, 1)
+    
+    # Interrupción entre la sincronización del temporal y el renombrado
+    os.replace(vault_path, temp_path(vault_path))
+    with open(vault_path, 'wb') as f:
+        f.write(old)
+    
+    reopened = open_vault()
+    assert {entry["id"] for entry in reopened.get_all_passwords()} == set(first + second)
+    assert not os.path.exists(temp_path(vault_path))
+
+def test_truncated_temp_file_is_discarded(open_vault, vault_path):
+    vault = open_vault(journal_mode=False)
+    vault.initialize_vault()
+    first = add_entries(vault, 1)
+    with open(vault_path, 'rb') as f:
+        old = f.read()
+    add_entries(vault, 1)
+    with open(vault_path, 'rb') as f:
+        new = f.read()
+    
+    # Interrupción mientras se escribía el temporal
+    with open(vault_path, 'wb') as f:
+        f.write(old)
+    with open(temp_path(vault_path), 'wb') as f:
+        f.write(new[:-10])
+    
+    reopened = open_vault()
+    assert [entry["id"] for entry in reopened.get_all_passwords()] == first
+    assert not os.path.exists(temp_path(vault_path))